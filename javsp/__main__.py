@@ -1,27 +1,20 @@
 import os
 import re
 import sys
-import json
 import time
 import logging
-from PIL import Image
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pydantic import ValidationError
-from pydantic_extra_types.pendulum_dt import Duration
 import requests
 import threading
 from typing import Dict, List
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-import colorama
-import pretty_errors
-from colorama import Fore, Style
 from tqdm import tqdm
 
 
-pretty_errors.configure(display_link=True)
-
-
 from javsp.print import TqdmOut
 from javsp.cropper import Cropper, get_cropper
 
@@ -41,39 +34,31 @@ from javsp.file import *
 from javsp.func import *
 from javsp.image import *
 from javsp.datatype import Movie, MovieInfo
-from javsp.web.base import download
+from javsp.pipeline import Stage, Pipeline
+from javsp.alias import actress_alias
+from javsp.infocache import InfoCache, info_cache, miss_cache
+from javsp.breaker import get_breaker
+from javsp.crawlerstats import crawler_stats
+from javsp.routing import label_router
+from javsp.scanindex import ScanIndex, scan_index
+from javsp.web.base import download, site_limiter, CancelToken, set_cancel_token, check_cancelled
+from javsp.web.registry import crawler_registry
 from javsp.web.exceptions import *
 from javsp.web.translate import translate_movie_info
 
 from javsp.config import Cfg, CrawlerID
 from javsp.prompt import prompt
 
-actressAliasMap = {}
-
 def resolve_alias(name):
     """将别名解析为固定的名字"""
-    for fixedName, aliases in actressAliasMap.items():
-        if name in aliases:
-            return fixedName
-    return name  # 如果找不到别名对应的固定名字，则返回原名
+    return actress_alias.resolve(name)  # 如果找不到别名对应的固定名字，则返回原名
 
 
 def import_crawlers():
-    """按配置文件的抓取器顺序将该字段转换为抓取器的函数列表"""
+    """登记配置文件中的抓取器（抓取器模块要到第一次抓取数据时才会被导入）"""
     unknown_mods = []
     for _, mods in Cfg().crawler.selection.items():
-        valid_mods = []
-        for name in mods:
-            try:
-                # 导入fc2fan抓取器的前提: 配置了fc2fan的本地路径
-                # if name == 'fc2fan' and (not os.path.isdir(Cfg().Crawler.fc2fan_local_path)):
-                #     logger.debug('由于未配置有效的fc2fan路径，已跳过该抓取器')
-                #     continue
-                import_name = 'javsp.web.' + name
-                __import__(import_name)
-                valid_mods.append(import_name)  # 抓取器有效: 使用完整模块路径，便于程序实际使用
-            except ModuleNotFoundError:
-                unknown_mods.append(name)       # 抓取器无效: 仅使用模块名，便于显示
+        unknown_mods.extend(crawler_registry.register(i.value for i in mods))
     if unknown_mods:
         logger.warning('配置的抓取器无效: ' + ', '.join(unknown_mods))
 
@@ -81,34 +66,88 @@ def import_crawlers():
 # 爬虫是IO密集型任务，可以通过多线程提升效率
 def parallel_crawler(movie: Movie, tqdm_bar=None):
     """使用多线程抓取不同网站的数据"""
+    # 抓取器会修改info中的番号，且抓取结束后影片的番号也可能被更正，因此先记下抓取前的番号供统计使用
+    origin_id = movie.dvdid or movie.cid
+
+    def on_success(crawler_name, info: MovieInfo):
+        movie_id = info.dvdid or info.cid
+        logger.debug(f"{crawler_name}: 抓取成功: '{movie_id}': '{info.url}'")
+        get_breaker(crawler_name.split('.')[-1]).record_success()
+        info_cache.save(cache_keys[crawler_name.split('.')[-1]], info)
+        miss_cache.forget(cache_keys[crawler_name.split('.')[-1]])
+        label_router.learn(crawler_name.split('.')[-1], info)
+        info.success = True
+        if isinstance(tqdm_bar, tqdm):
+            tqdm_bar.set_description(f'{crawler_name}: 抓取完成')
+
+    def on_error(crawler_name, info: MovieInfo, e: Exception, cnt, retry) -> bool:
+        """处理抓取器抛出的异常，返回是否应当继续重试"""
+        breaker = get_breaker(crawler_name.split('.')[-1])
+        if isinstance(e, CrawlerCancelled):
+            logger.debug(f'{crawler_name}: {e}')
+            return False
+        elif isinstance(e, MovieNotFoundError):
+            logger.debug(e)
+            # 站点能够明确告知未找到影片，说明它是正常工作的
+            breaker.record_success()
+            miss_cache.record(cache_keys[crawler_name.split('.')[-1]])
+            label_router.record_miss(crawler_name.split('.')[-1], origin_id)
+            return False
+        elif isinstance(e, MovieDuplicateError):
+            logger.exception(e)
+            return False
+        elif isinstance(e, (SiteBlocked, CredentialError)):
+            logger.error(e)
+            breaker.record_failure(fatal=True)
+            return False
+        elif isinstance(e, SitePermissionError):
+            logger.error(e)
+            return False
+        elif isinstance(e, requests.exceptions.RequestException):
+            logger.debug(f'{crawler_name}: 网络错误，正在重试 ({cnt+1}/{retry}): \n{repr(e)}')
+            breaker.record_failure()
+            if isinstance(tqdm_bar, tqdm):
+                tqdm_bar.set_description(f'{crawler_name}: 网络错误，正在重试')
+        else:
+            logger.exception(e)
+        return True
+
+    def on_finish(crawler_name, info: MovieInfo, error: Exception, elapsed):
+        """记录站点是否找到了影片及耗时，用于统计站点的命中率（网络错误等与影片无关的失败不计入统计）"""
+        site = crawler_name.split('.')[-1]
+        if info.success:
+            crawler_stats.record(site, origin_id, info, True, elapsed)
+        elif isinstance(error, MovieNotFoundError):
+            crawler_stats.record(site, origin_id, info, False, elapsed)
+
     def wrapper(parser, info: MovieInfo, retry):
         """对抓取器函数进行包装，便于更新提示信息和自动重试"""
         crawler_name = threading.current_thread().name
-        task_info = f'Crawler: {crawler_name}: {info.dvdid}'
+        site = crawler_name.split('.')[-1]
+        start, error = time.monotonic(), None
         for cnt in range(retry):
-            try:
-                parser(info)
-                movie_id = info.dvdid or info.cid
-                logger.debug(f"{crawler_name}: 抓取成功: '{movie_id}': '{info.url}'")
-                setattr(info, 'success', True)
-                if isinstance(tqdm_bar, tqdm):
-                    tqdm_bar.set_description(f'{crawler_name}: 抓取完成')
-                break
-            except MovieNotFoundError as e:
-                logger.debug(e)
-                break
-            except MovieDuplicateError as e:
-                logger.exception(e)
+            if not get_breaker(site).allow():
+                logger.debug(f'{crawler_name}: 站点暂时无法访问，跳过')
                 break
-            except (SiteBlocked, SitePermissionError, CredentialError) as e:
-                logger.error(e)
+            try:
+                check_cancelled()
+                with site_limiter.slot(site):
+                    parser(info)
+                on_success(crawler_name, info)
                 break
-            except requests.exceptions.RequestException as e:
-                logger.debug(f'{crawler_name}: 网络错误，正在重试 ({cnt+1}/{retry}): \n{repr(e)}')
-                if isinstance(tqdm_bar, tqdm):
-                    tqdm_bar.set_description(f'{crawler_name}: 网络错误，正在重试')
             except Exception as e:
-                logger.exception(e)
+                error = e
+                if not on_error(crawler_name, info, e, cnt, retry):
+                    break
+        on_finish(crawler_name, info, error, time.monotonic() - start)
+
+    def thread_wrapper(fut: Future, token: CancelToken, *args):
+        """在线程中运行wrapper，并在结束时通知等待方"""
+        set_cancel_token(token)
+        try:
+            wrapper(*args)
+        finally:
+            fut.set_result(None)
 
     # 根据影片的数据源获取对应的抓取器
     crawler_mods: List[CrawlerID] = Cfg().crawler.selection[movie.data_src]
@@ -121,26 +160,75 @@ def parallel_crawler(movie: Movie, tqdm_bar=None):
             i.dvdid = None
         for i in Cfg().crawler.selection.normal:
             all_info[i.value] = MovieInfo(movie.dvdid)
-    thread_pool = []
-    for mod_partial, info in all_info.items():
+    futures: Dict[str, Future] = {}
+    tokens: Dict[str, CancelToken] = {}
+    # 缓存的键名要在抓取前生成：抓取器会将info中的番号改为站点上的番号
+    cache_keys = {k: InfoCache.make_key(k, v) for k, v in all_info.items()}
+    # 跳过不收录此番号前缀的站点。自适应模式下还会根据历史统计跳过很少能找到此类影片的站点，
+    # 并优先启动最有可能尽快返回数据的站点（不影响汇总数据时的优先级）
+    launch_order = label_router.filter(list(all_info), movie.dvdid)
+    if crawler_stats.enabled():
+        launch_order = crawler_stats.select(launch_order, origin_id)
+    for mod_partial in all_info:
+        tokens[mod_partial] = CancelToken()
+        if mod_partial not in launch_order:
+            futures[mod_partial] = Future()
+            futures[mod_partial].set_result(None)
+    for mod_partial in launch_order:
+        info = all_info[mod_partial]
         mod = f"javsp.web.{mod_partial}"
-        parser = getattr(sys.modules[mod], 'parse_data')
+        # 已缓存的数据无需再次抓取
+        if info_cache.load(cache_keys[mod_partial], info):
+            logger.debug(f"{mod}: 使用缓存的数据: '{info.dvdid or info.cid}'")
+            info.success = True
+            futures[mod_partial] = Future()
+            futures[mod_partial].set_result(None)
+            continue
+        # 此站点最近未找到过这部影片，暂时跳过
+        if miss_cache.is_missing(cache_keys[mod_partial]):
+            logger.debug(f"{mod}: 最近未找到过此影片，跳过: '{info.dvdid or info.cid}'")
+            futures[mod_partial] = Future()
+            futures[mod_partial].set_result(None)
+            continue
+        # 抓取器模块在第一次需要抓取数据时才会被导入
+        try:
+            parser = crawler_registry.get_parser(mod_partial)
+        except Exception:
+            # 错误信息只在第一次加载失败时由crawler_registry输出
+            logger.debug(f"{mod}: 抓取器不可用，跳过")
+            futures[mod_partial] = Future()
+            futures[mod_partial].set_result(None)
+            continue
         # 将all_info中的info实例传递给parser，parser抓取完成后，info实例的值已经完成更新
         # TODO: 抓取器如果带有parse_data_raw，说明它已经自行进行了重试处理，此时将重试次数设置为1
-        if hasattr(sys.modules[mod], 'parse_data_raw'):
-            th = threading.Thread(target=wrapper, name=mod, args=(parser, info, 1))
+        if crawler_registry.handles_retry(mod_partial):
+            retry = 1
         else:
-            th = threading.Thread(target=wrapper, name=mod, args=(parser, info, Cfg().network.retry))
+            retry = Cfg().network.retry
+        fut = Future()
+        th = threading.Thread(target=thread_wrapper, name=mod, args=(fut, tokens[mod_partial], parser, info, retry), daemon=True)
         th.start()
-        thread_pool.append(th)
-    # 等待所有线程结束
+        futures[mod_partial] = fut
+    # 所有抓取器共用同一个截止时间，因此最长等待时间不会随抓取器的数量增加
     timeout = Cfg().network.retry * Cfg().network.timeout.total_seconds()
-    for th in thread_pool:
-        th: threading.Thread
-        th.join(timeout=timeout)
+    sufficient = False
+    if Cfg().crawler.early_completion and not (movie.data_src == 'cid' and movie.dvdid):
+        sufficient = wait_until_sufficient(all_info, futures, timeout)
+    else:
+        wait(futures.values(), timeout=timeout)
+    # 取消仍未结束的抓取器并丢弃它们的数据，避免它们在汇总数据时仍在修改数据
+    unfinished = [k for k, fut in futures.items() if not fut.done()]
+    if unfinished:
+        if sufficient:
+            logger.debug(f"已获取到所需的字段，不再等待抓取器: {', '.join(unfinished)}")
+        else:
+            logger.debug(f"抓取超时，已放弃抓取器: {', '.join(unfinished)}")
+        for name in unfinished:
+            tokens[name].cancel()
+        all_info = {k: v for k, v in all_info.items() if k not in unfinished}
     # 根据抓取结果更新影片类型判定
     if movie.data_src == 'cid' and movie.dvdid:
-        titles = [all_info[i].title for i in Cfg().crawler.selection[movie.data_src]]
+        titles = [all_info[i].title for i in Cfg().crawler.selection[movie.data_src] if i in all_info]
         if any(titles):
             movie.dvdid = None
             all_info = {k: v for k, v in all_info.items() if k in Cfg().crawler.selection['cid']}
@@ -150,14 +238,37 @@ def parallel_crawler(movie: Movie, tqdm_bar=None):
             movie.cid = None
             all_info = {k: v for k, v in all_info.items() if k not in Cfg().crawler.selection['cid']}
     # 删除抓取失败的站点对应的数据
-    all_info = {k:v for k,v in all_info.items() if hasattr(v, 'success')}
-    for info in all_info.values():
-        del info.success
+    all_info = {k:v for k,v in all_info.items() if v.success}
     # 删除all_info中键名中的'web.'
     all_info = {k[4:]:v for k,v in all_info.items()}
     return all_info
 
 
+def wait_until_sufficient(all_info: Dict[str, MovieInfo], futures: Dict[str, Future], timeout) -> bool:
+    """等待抓取器结束，直到按优先级排在前面的抓取器已经提供了所需的全部字段
+
+    Returns:
+        bool: 是否已经获取到所需的全部字段（否则表示等待超时或所有抓取器都已结束）
+    """
+    wanted = set(Cfg().crawler.required_keys) | set(Cfg().crawler.desired_keys)
+    deadline = time.monotonic() + timeout
+    pending = set(futures.values())
+    while pending:
+        done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        # all_info是按照优先级生成的，一旦遇到仍在运行的抓取器，就需要继续等待它的结果
+        filled = set()
+        for name, info in all_info.items():
+            if not futures[name].done():
+                break
+            if info.success:
+                filled.update(i for i in wanted if getattr(info, i.value))
+            if filled >= wanted:
+                return True
+    return False
+
+
 def info_summary(movie: Movie, all_info: Dict[str, MovieInfo]):
     """汇总多个来源的在线数据生成最终数据"""
     final_info = MovieInfo(movie)
@@ -173,12 +284,11 @@ def info_summary(movie: Movie, all_info: Dict[str, MovieInfo]):
     ########## 然后检查所有字段，如果某个字段还是默认值，则按照优先级选取数据 ##########
     # parser直接更新了all_info中的项目，而初始all_info是按照优先级生成的，已经符合配置的优先级顺序了
     # 按照优先级取出各个爬虫获取到的信息
-    attrs = [i for i in dir(final_info) if not i.startswith('_')]
     covers, big_covers = [], []
     for name, data in all_info.items():
         absorbed = []
-        # 遍历所有属性，如果某一属性当前值为空而爬取的数据中含有该属性，则采用爬虫的属性
-        for attr in attrs:
+        # 遍历所有字段，如果某一字段当前值为空而爬取的数据中含有该字段，则采用爬虫的数据
+        for attr in MovieInfo.FIELDS:
             incoming = getattr(data, attr)
             current = getattr(final_info, attr)
             if attr == 'cover':
@@ -226,8 +336,8 @@ def info_summary(movie: Movie, all_info: Dict[str, MovieInfo]):
             case UseJavDBCover.no:
                 covers.remove(javdb_cover)
 
-    setattr(final_info, 'covers', covers)
-    setattr(final_info, 'big_covers', big_covers)
+    final_info.covers = covers
+    final_info.big_covers = big_covers
     # 对cover和big_cover赋值，避免后续检查必须字段时出错
     if covers:
         final_info.cover = covers[0]
@@ -237,8 +347,13 @@ def info_summary(movie: Movie, all_info: Dict[str, MovieInfo]):
     # 特殊的 genre
     if final_info.genre is None:
         final_info.genre = []
+    # 查找外挂字幕（使用扫描影片时建立的字幕索引，通常不需要再访问磁盘）
+    if movie.dvdid and movie.files:
+        movie.sub_file = find_subtitle_in_dir(os.path.dirname(os.path.abspath(movie.files[0])), movie.dvdid)
     if movie.hard_sub:
         final_info.genre.append('内嵌字幕')
+    elif movie.sub_file:
+        final_info.genre.append('外挂字幕')
     if movie.uncensored:
         final_info.genre.append('无码流出/破解')
 
@@ -281,22 +396,22 @@ def generate_names(movie: Movie):
     d['actress'] = ','.join(actress) if actress else Cfg().summarizer.default.actress
 
     # 保存label供后面判断裁剪图片的方式使用
-    setattr(info, 'label', d['label'].upper())
+    info.label = d['label'].upper()
     # 处理字段：替换不能作为文件名的字符，移除首尾的空字符
     for k, v in d.items():
         d[k] = replace_illegal_chars(v.strip())
 
     # 生成nfo文件中的影片标题
     nfo_title = Cfg().summarizer.nfo.title_pattern.format(**d)
-    setattr(info, 'nfo_title', nfo_title)
+    info.nfo_title = nfo_title
     
     # 使用字典填充模板，生成相关文件的路径（多分片影片要考虑CD-x部分）
     cdx = '' if len(movie.files) <= 1 else '-CD1'
-    if hasattr(info, 'title_break'):
+    if info.title_break is not None:
         title_break = info.title_break
     else:
         title_break = split_by_punc(d['title'])
-    if hasattr(info, 'ori_title_break'):
+    if info.ori_title_break is not None:
         ori_title_break = info.ori_title_break
     else:
         ori_title_break = split_by_punc(d['rawtitle'])
@@ -365,6 +480,7 @@ def generate_names(movie: Movie):
 
 def reviewMovieID(all_movies, root):
     """人工检查每一部影片的番号"""
+    from colorama import Fore, Style
     count = len(all_movies)
     logger.info('进入手动模式检查番号: ')
     for i, movie in enumerate(all_movies, start=1):
@@ -396,10 +512,21 @@ def reviewMovieID(all_movies, root):
         print()
 
 
-SUBTITLE_MARK_FILE = Image.open(os.path.abspath(resource_path('image/sub_mark.png')))
-UNCENSORED_MARK_FILE = Image.open(os.path.abspath(resource_path('image/unc_mark.png')))
+# 在导入时（切换工作目录之前）确定水印图片的绝对路径，只有图片的读取推迟到首次使用时
+SUBTITLE_MARK_FILE = os.path.abspath(resource_path('image/sub_mark.png'))
+UNCENSORED_MARK_FILE = os.path.abspath(resource_path('image/unc_mark.png'))
+
+@lru_cache(maxsize=None)
+def load_mark_image(file):
+    """读取水印图片（首次使用时才读取，之后复用）"""
+    from PIL import Image
+    img = Image.open(file)
+    img.load()
+    return img
 
 def process_poster(movie: Movie):
+    from PIL import Image
+
     def should_use_ai_crop_match(label):
         for r in Cfg().summarizer.cover.crop.on_id_pattern:
             if re.match(r, label):
@@ -415,20 +542,122 @@ def process_poster(movie: Movie):
     fanart_cropped = cropper.crop(fanart_image)
 
     if Cfg().summarizer.cover.add_label:
-        if movie.hard_sub:
-            fanart_cropped = add_label_to_poster(fanart_cropped, SUBTITLE_MARK_FILE, LabelPostion.BOTTOM_RIGHT)
+        if movie.hard_sub or movie.sub_file:
+            fanart_cropped = add_label_to_poster(fanart_cropped, load_mark_image(SUBTITLE_MARK_FILE), LabelPostion.BOTTOM_RIGHT)
         if movie.uncensored:
-            fanart_cropped = add_label_to_poster(fanart_cropped, UNCENSORED_MARK_FILE, LabelPostion.BOTTOM_LEFT)
+            fanart_cropped = add_label_to_poster(fanart_cropped, load_mark_image(UNCENSORED_MARK_FILE), LabelPostion.BOTTOM_LEFT)
     fanart_cropped.save(movie.poster_file)
 
+def check_step(result, msg='步骤错误', bar: tqdm = None):
+    """检查一个整理步骤的结果，并负责更新tqdm的进度"""
+    if result:
+        if bar is not None:
+            bar.update()
+    else:
+        raise Exception(msg + '\n')
+
+
+def set_bar_desc(bar: tqdm, desc: str):
+    """更新步骤进度条的描述（流水线模式下没有单独的步骤进度条）"""
+    if bar is not None:
+        bar.set_description(desc)
+
+
+def scrape_movie(movie: Movie, bar: tqdm = None):
+    """整理步骤: 抓取并汇总影片数据"""
+    set_bar_desc(bar, '启动并发任务')
+    all_info = parallel_crawler(movie, bar)
+    msg = f'为其配置的{len(Cfg().crawler.selection[movie.data_src])}个抓取器均未获取到影片信息'
+    check_step(all_info, msg, bar)
+
+    set_bar_desc(bar, '汇总数据')
+    has_required_keys = info_summary(movie, all_info)
+    check_step(has_required_keys, bar=bar)
+
+
+def translate_movie(movie: Movie, bar: tqdm = None):
+    """整理步骤: 翻译影片信息"""
+    if Cfg().translator.engine:
+        set_bar_desc(bar, '翻译影片信息')
+        success = translate_movie_info(movie.info)
+        check_step(success, bar=bar)
+
+
+def process_images(movie: Movie, bar: tqdm = None):
+    """整理步骤: 生成文件名，下载封面、剧照并裁剪海报"""
+    generate_names(movie)
+    check_step(movie.save_dir, '无法按命名规则生成目标文件夹', bar)
+    if not os.path.exists(movie.save_dir):
+        os.makedirs(movie.save_dir)
+
+    set_bar_desc(bar, '下载封面图片')
+    if Cfg().summarizer.cover.highres:
+        cover_dl = download_cover(movie.info.covers, movie.fanart_file, movie.info.big_covers)
+    else:
+        cover_dl = download_cover(movie.info.covers, movie.fanart_file)
+    check_step(cover_dl, '下载封面图片失败', bar)
+    cover, pic_path = cover_dl
+    # 确保实际下载的封面的url与即将写入到movie.info中的一致
+    if cover != movie.info.cover:
+        movie.info.cover = cover
+    # 根据实际下载的封面的格式更新fanart/poster等图片的文件名
+    if pic_path != movie.fanart_file:
+        movie.fanart_file = pic_path
+        actual_ext = os.path.splitext(pic_path)[1]
+        movie.poster_file = os.path.splitext(movie.poster_file)[0] + actual_ext
+
+    process_poster(movie)
+
+    check_step(True, bar=bar)
+
+    if Cfg().summarizer.extra_fanarts.enabled:
+        set_bar_desc(bar, '下载剧照')
+        if movie.info.preview_pics:
+            extrafanartdir = movie.save_dir + '/extrafanart'
+            os.mkdir(extrafanartdir)
+            for (id, pic_url) in enumerate(movie.info.preview_pics):
+                set_bar_desc(bar, f"Downloading extrafanart {id} from url: {pic_url}")
+
+                fanart_destination = f"{extrafanartdir}/{id}.png"
+                try:
+                    info = download(pic_url, fanart_destination)
+                    if valid_pic(fanart_destination):
+                        filesize = get_fmt_size(pic_path)
+                        width, height = get_pic_size(pic_path)
+                        elapsed = time.strftime("%M:%S", time.gmtime(info['elapsed']))
+                        speed = get_fmt_size(info['rate']) + '/s'
+                        logger.info(f"已下载剧照{pic_url} {id}.png: {width}x{height}, {filesize} [{elapsed}, {speed}]")
+                    else:
+                        check_step(False, f"下载剧照{id}: {pic_url}失败", bar)
+                except:
+                    check_step(False, f"下载剧照{id}: {pic_url}失败", bar)
+        check_step(True, bar=bar)
+
+
+def organize_files(movie: Movie, bar: tqdm = None):
+    """整理步骤: 写入NFO并移动影片文件"""
+    set_bar_desc(bar, '写入NFO')
+    write_nfo(movie.info, movie.nfo_file)
+    check_step(True, bar=bar)
+    if Cfg().summarizer.move_files:
+        set_bar_desc(bar, '移动影片文件')
+        movie.rename_files(Cfg().summarizer.path.hard_link)
+        check_step(True, bar=bar)
+        logger.info(f'整理完成，相关文件已保存到: {movie.save_dir}\n')
+    else:
+        logger.info(f'刮削完成，相关文件已保存到: {movie.nfo_file}\n')
+
+
+def mark_scan_status(movie: Movie, success: bool):
+    """在扫描索引中记录影片的整理结果（供增量模式使用）"""
+    if scan_index.enabled():
+        scan_index.set_status(movie.files, ScanIndex.DONE if success else ScanIndex.FAILED)
+
+
 def RunNormalMode(all_movies):
     """普通整理模式"""
-    def check_step(result, msg='步骤错误'):
-        """检查一个整理步骤的结果，并负责更新tqdm的进度"""
-        if result:
-            inner_bar.update()
-        else:
-            raise Exception(msg + '\n')
+    if Cfg().other.pipeline.enabled:
+        return RunPipelineMode(all_movies)
 
     outer_bar = tqdm(all_movies, desc='整理影片', ascii=True, leave=False)
     total_step = 6
@@ -445,84 +674,15 @@ def RunNormalMode(all_movies):
             logger.info('正在整理: ' + ', '.join(filenames))
             inner_bar = tqdm(total=total_step, desc='步骤', ascii=True, leave=False)
             # 依次执行各个步骤
-            inner_bar.set_description(f'启动并发任务')
-            all_info = parallel_crawler(movie, inner_bar)
-            msg = f'为其配置的{len(Cfg().crawler.selection[movie.data_src])}个抓取器均未获取到影片信息'
-            check_step(all_info, msg)
-
-            inner_bar.set_description('汇总数据')
-            has_required_keys = info_summary(movie, all_info)
-            check_step(has_required_keys)
-
-            if Cfg().translator.engine:
-                inner_bar.set_description('翻译影片信息')
-                success = translate_movie_info(movie.info)
-                check_step(success)
-
-            generate_names(movie)
-            check_step(movie.save_dir, '无法按命名规则生成目标文件夹')
-            if not os.path.exists(movie.save_dir):
-                os.makedirs(movie.save_dir)
-
-            inner_bar.set_description('下载封面图片')
-            if Cfg().summarizer.cover.highres:
-                cover_dl = download_cover(movie.info.covers, movie.fanart_file, movie.info.big_covers)
-            else:
-                cover_dl = download_cover(movie.info.covers, movie.fanart_file)
-            check_step(cover_dl, '下载封面图片失败')
-            cover, pic_path = cover_dl
-            # 确保实际下载的封面的url与即将写入到movie.info中的一致
-            if cover != movie.info.cover:
-                movie.info.cover = cover
-            # 根据实际下载的封面的格式更新fanart/poster等图片的文件名
-            if pic_path != movie.fanart_file:
-                movie.fanart_file = pic_path
-                actual_ext = os.path.splitext(pic_path)[1]
-                movie.poster_file = os.path.splitext(movie.poster_file)[0] + actual_ext
-
-            process_poster(movie)
-
-            check_step(True)
-
-            if Cfg().summarizer.extra_fanarts.enabled:
-                scrape_interval = Cfg().summarizer.extra_fanarts.scrap_interval.total_seconds()
-                inner_bar.set_description('下载剧照')
-                if movie.info.preview_pics:
-                    extrafanartdir = movie.save_dir + '/extrafanart'
-                    os.mkdir(extrafanartdir)
-                    for (id, pic_url) in enumerate(movie.info.preview_pics):
-                        inner_bar.set_description(f"Downloading extrafanart {id} from url: {pic_url}")
-                                                                                                                                
-                        fanart_destination = f"{extrafanartdir}/{id}.png"
-                        try:
-                            info = download(pic_url, fanart_destination)
-                            if valid_pic(fanart_destination):
-                                filesize = get_fmt_size(pic_path)
-                                width, height = get_pic_size(pic_path)
-                                elapsed = time.strftime("%M:%S", time.gmtime(info['elapsed']))
-                                speed = get_fmt_size(info['rate']) + '/s'
-                                logger.info(f"已下载剧照{pic_url} {id}.png: {width}x{height}, {filesize} [{elapsed}, {speed}]")
-                            else:
-                                check_step(False, f"下载剧照{id}: {pic_url}失败")
-                        except:
-                            check_step(False, f"下载剧照{id}: {pic_url}失败")
-                        time.sleep(scrape_interval)
-                check_step(True)
-
-            inner_bar.set_description('写入NFO')
-            write_nfo(movie.info, movie.nfo_file)
-            check_step(True)
-            if Cfg().summarizer.move_files:
-                inner_bar.set_description('移动影片文件')
-                movie.rename_files(Cfg().summarizer.path.hard_link)
-                check_step(True)
-                logger.info(f'整理完成，相关文件已保存到: {movie.save_dir}\n')
-            else:
-                logger.info(f'刮削完成，相关文件已保存到: {movie.nfo_file}\n')
-
-            if movie != all_movies[-1] and Cfg().crawler.sleep_after_scraping > Duration(0):
-                time.sleep(Cfg().crawler.sleep_after_scraping.total_seconds())
+            scrape_movie(movie, inner_bar)
+            translate_movie(movie, inner_bar)
+            process_images(movie, inner_bar)
+            organize_files(movie, inner_bar)
+            mark_scan_status(movie, True)
             return_movies.append(movie)
+        except Exception:
+            mark_scan_status(movie, False)
+            raise
         # except Exception as e:
         #     logger.debug(e, exc_info=True)
         #     logger.error(f'整理失败: {e}')
@@ -531,6 +691,64 @@ def RunNormalMode(all_movies):
     return return_movies
 
 
+def run_first_pass(func, *args):
+    """执行启动时的整理。监视模式下整理出错时只记录错误，之后继续监视文件夹"""
+    if not Cfg().scanner.watch.enabled:
+        return func(*args)
+    try:
+        return func(*args)
+    except Exception as e:
+        logger.error(f'整理失败: {e}')
+        logger.debug(e, exc_info=True)
+
+
+def RunStreamingMode(root):
+    """边扫描边整理：每个文件夹扫描完成后立即开始整理其中的影片，返回找到的影片数量"""
+    count = 0
+    scanned = iter_movies(root)
+    def movies():
+        nonlocal count
+        for movie in scanned:
+            count += 1
+            yield movie
+    try:
+        RunNormalMode(movies())
+    finally:
+        # 整理中途出错时，也要结束扫描以保存扫描索引
+        scanned.close()
+    return count
+
+
+def RunPipelineMode(all_movies):
+    """流水线整理模式：不同影片的抓取、翻译、图片、文件等步骤重叠执行"""
+    cfg = Cfg().other.pipeline
+    # 边扫描边整理时，影片的总数是未知的
+    total = len(all_movies) if hasattr(all_movies, '__len__') else None
+    outer_bar = tqdm(total=total, desc='整理影片', ascii=True, leave=False)
+
+    def crawl(movie: Movie):
+        filenames = [os.path.split(i)[1] for i in movie.files]
+        logger.info('正在整理: ' + ', '.join(filenames))
+        scrape_movie(movie)
+
+    stages = [
+        Stage('抓取数据', crawl, cfg.crawl_workers),
+        Stage('翻译影片信息', translate_movie, cfg.translate_workers),
+        Stage('处理图片', process_images, cfg.image_workers),
+        Stage('整理文件', organize_files, cfg.file_workers),
+    ]
+    def on_done(movie: Movie, success: bool):
+        mark_scan_status(movie, success)
+        outer_bar.update()
+
+    # 与逐部整理时一致：一部影片整理失败时中止整理，不再处理后面的影片
+    pipeline = Pipeline(stages, cfg.queue_size, on_done=on_done, fail_fast=True)
+    try:
+        return pipeline.run(all_movies)
+    finally:
+        outer_bar.close()
+
+
 def download_cover(covers, fanart_path, big_covers=[]):
     """下载封面图片"""
     # 优先下载高清封面
@@ -591,33 +809,54 @@ def entry():
         print(e.errors())
         exit(1)
 
-    global actressAliasMap
     if Cfg().crawler.normalize_actress_name:
-        actressAliasFilePath = resource_path("data/actress_alias.json")
-        with open(actressAliasFilePath, "r", encoding="utf-8") as file:
-            actressAliasMap = json.load(file)
+        actress_alias.load_from_config()
 
+    import colorama
+    import pretty_errors
     colorama.init(autoreset=True)
+    pretty_errors.configure(display_link=True)
 
-    # 检查更新
+    # 在后台检查更新，不阻塞影片的扫描
     version_info = 'JavSP ' + getattr(sys, 'javsp_version', '未知版本/从代码运行')
     logger.debug(version_info.center(60, '='))
-    check_update(Cfg().other.check_update, Cfg().other.auto_update)
+    update_checker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='check_update')
+    update_info = update_checker.submit(fetch_update_info, Cfg().other.check_update)
     root = get_scan_dir(Cfg().scanner.input_directory)
     error_exit(root, '未选择要扫描的文件夹')
-    # 导入抓取器，必须在chdir之前
+    # 登记抓取器（只检查模块是否存在，实际的导入发生在首次抓取时，此时工作目录已经改变，
+    # 因此抓取器使用的数据文件都要通过resource_path获取绝对路径）
     import_crawlers()
     os.chdir(root)
 
     print(f'扫描影片文件...')
-    recognized = scan_movies(root)
-    movie_count = len(recognized)
-    recognize_fail = []
-    error_exit(movie_count, '未找到影片文件')
-    logger.info(f'扫描影片文件：共找到 {movie_count} 部影片')
-    if Cfg().scanner.manual:
-        reviewMovieID(recognized, root)
-    RunNormalMode(recognized + recognize_fail)
+    watch = Cfg().scanner.watch.enabled
+    if Cfg().scanner.streaming and not Cfg().scanner.manual:
+        # 不需要人工检查番号时，边扫描边整理，网络请求与文件夹的扫描可以同时进行
+        movie_count = run_first_pass(RunStreamingMode, root) or 0
+        # 整理完成后再输出版本信息（自动更新也在此时进行，以免与整理过程冲突）
+        check_update(Cfg().other.check_update, Cfg().other.auto_update, update_info=update_info.result())
+        update_checker.shutdown(wait=False)
+        error_exit(movie_count or watch, '未找到影片文件')
+        logger.info(f'扫描影片文件：共找到 {movie_count} 部影片')
+    else:
+        recognized = scan_movies(root)
+        # 扫描完成后再输出版本信息（自动更新也在此时进行，以免与整理过程冲突）
+        check_update(Cfg().other.check_update, Cfg().other.auto_update, update_info=update_info.result())
+        update_checker.shutdown(wait=False)
+        movie_count = len(recognized)
+        recognize_fail = []
+        # 监视模式下即使暂时没有影片也要继续运行
+        error_exit(movie_count or watch, '未找到影片文件')
+        logger.info(f'扫描影片文件：共找到 {movie_count} 部影片')
+        if movie_count:
+            if Cfg().scanner.manual:
+                reviewMovieID(recognized, root)
+            run_first_pass(RunNormalMode, recognized + recognize_fail)
+    if watch:
+        # 在同一个进程中持续整理新的影片，抓取器的会话、各类缓存等都可以继续使用
+        from javsp.watcher import watch_movies
+        watch_movies(root, RunNormalMode)
 
     sys.exit(0)
 
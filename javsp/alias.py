@@ -0,0 +1,89 @@
+"""女优别名的倒排索引：将各个别名直接映射到统一后的名字"""
+import json
+import logging
+import unicodedata
+from typing import Dict, Iterable, List
+
+
+from javsp.config import Cfg
+from javsp.lib import resource_path
+
+
+__all__ = ['normalize_name', 'ActressAliasIndex', 'actress_alias']
+
+
+logger = logging.getLogger(__name__)
+
+
+# 女优名字中常见的旧字体/异体字，统一为日本的新字体。只用于匹配，不会修改最终使用的名字
+KANJI_VARIANTS = str.maketrans({
+    '亞': '亜', '櫻': '桜', '澤': '沢', '惠': '恵', '戀': '恋', '瀨': '瀬', '凜': '凛',
+    '眞': '真', '國': '国', '廣': '広', '邊': '辺', '邉': '辺', '齋': '斎', '齊': '斉',
+    '髙': '高', '﨑': '崎', '嵜': '崎', '藝': '芸', '淺': '浅', '實': '実', '壽': '寿',
+    '繪': '絵', '彌': '弥', '與': '与', '來': '来', '戶': '戸', '兒': '児', '黑': '黒',
+    '萬': '万', '禮': '礼', '龜': '亀', '靜': '静', '淸': '清', '團': '団', '圓': '円',
+    '樂': '楽',
+})
+
+
+def normalize_name(name: str) -> str:
+    """统一名字的写法（全角/半角、大小写、空格和异体字），用于模糊匹配"""
+    name = unicodedata.normalize('NFKC', name)
+    return ''.join(name.split()).casefold().translate(KANJI_VARIANTS)
+
+
+class ActressAliasIndex:
+    """女优别名索引
+
+    别名文件的格式为 {统一的名字: [别名, ...]}。加载时将其转换为 {别名: 统一的名字}，
+    因此查找一个名字的开销与别名的数量无关。同一个别名出现在多个条目中时，以先加载的条目为准
+    """
+    def __init__(self, fuzzy_match=True) -> None:
+        self.reset(fuzzy_match)
+
+    def reset(self, fuzzy_match: bool):
+        self.fuzzy_match = fuzzy_match
+        self.exact: Dict[str, str] = {}
+        self.fuzzy: Dict[str, str] = {}
+        self.sources: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def add(self, mapping: Dict[str, Iterable[str]]):
+        """合并一组别名（已经存在的别名不会被覆盖）"""
+        for fixed_name, aliases in mapping.items():
+            for alias in aliases:
+                self.exact.setdefault(alias, fixed_name)
+                if self.fuzzy_match:
+                    self.fuzzy.setdefault(normalize_name(alias), fixed_name)
+
+    def load(self, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        self.add(mapping)
+        self.sources.append(path)
+        logger.debug(f"已加载女优别名文件: '{path}'")
+
+    def resolve(self, name: str) -> str:
+        """将别名解析为固定的名字，找不到时返回原名"""
+        fixed_name = self.exact.get(name)
+        if fixed_name is None:
+            if self.fuzzy_match:
+                return self.fuzzy.get(normalize_name(name), name)
+            return name
+        return fixed_name
+
+    def load_from_config(self):
+        """按照配置文件加载别名：用户的别名文件优先于内置的别名文件"""
+        cfg = Cfg().crawler.actress_alias
+        self.reset(cfg.fuzzy_match)
+        for path in cfg.user_files:
+            try:
+                self.load(str(path))
+            except (OSError, ValueError) as e:
+                logger.error(f"无法读取女优别名文件'{path}': {e}")
+        self.load(resource_path('data/actress_alias.json'))
+
+
+actress_alias = ActressAliasIndex()
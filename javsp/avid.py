@@ -2,143 +2,228 @@
 import os
 import re
 from pathlib import Path
+from functools import lru_cache
+from typing import Tuple
 
 
-__all__ = ['get_id', 'get_cid', 'guess_av_type']
+__all__ = ['get_id', 'get_cid', 'guess_av_type', 'get_ids', 'IDExtractor']
 
 
 from javsp.config import Cfg
 
-def get_id(filepath_str: str) -> str:
-    """从给定的文件路径中提取番号（DVD ID）"""
-    filepath = Path(filepath_str)
-    # 通常是接收文件的路径，当然如果是普通字符串也可以
-    ignore_pattern = re.compile('|'.join(Cfg().scanner.ignored_id_pattern))
-    norm = ignore_pattern.sub('', filepath.stem).upper()
-    if 'FC2' in norm:
-        # 根据FC2 Club的影片数据，FC2编号为5-7个数字
-        match = re.search(r'FC2[^A-Z\d]{0,5}(PPV[^A-Z\d]{0,5})?(\d{5,7})', norm, re.I)
-        if match:
-            return 'FC2-' + match.group(2)
-    elif 'HEYDOUGA' in norm:
-        match = re.search(r'(HEYDOUGA)[-_]*(\d{4})[-_]0?(\d{3,5})', norm, re.I)
-        if match:
-            return '-'.join(match.groups())
-    elif 'GETCHU' in norm:
-        match = re.search(r'GETCHU[-_]*(\d+)', norm, re.I)
-        if match:
-            return 'GETCHU-' + match.group(1)
-    elif 'GYUTTO' in norm:
-        match = re.search(r'GYUTTO-(\d+)', norm, re.I)
-        if match:
-            return 'GYUTTO-' + match.group(1)
-    elif '259LUXU' in norm: # special case having form of '259luxu'
-        match = re.search(r'259LUXU-(\d+)', norm, re.I)
-        if match:
-            return '259LUXU-' + match.group(1)
 
-    else:
-        # 先尝试移除可疑域名进行匹配，如果匹配不到再使用原始文件名进行匹配
-        no_domain = re.sub(r'\w{3,10}\.(COM|NET|APP|XYZ)', '', norm, flags=re.I)
-        if no_domain != norm:
-            avid = get_id(no_domain)
-            if avid:
-                return avid
-        # 匹配缩写成hey的heydouga影片。由于番号分三部分，要先于后面分两部分的进行匹配
-        match = re.search(r'(?:HEY)[-_]*(\d{4})[-_]0?(\d{3,5})', norm, re.I)
-        if match:
-            return 'heydouga-' + '-'.join(match.groups())
-        # 匹配片商 MUGEN 的奇怪番号。由于MK3D2DBD的模式，要放在普通番号模式之前进行匹配
-        match = re.search(r'(MKB?D)[-_]*(S\d{2,3})|(MK3D2DBD|S2M|S2MBD)[-_]*(\d{2,3})', norm, re.I)
-        if match:
-            if match.group(1) is not None:
-                avid = match.group(1) + '-' + match.group(2)
-            else:
-                avid = match.group(3) + '-' + match.group(4)
+# 各个正则表达式只在导入时编译一次。由于norm已经转换为大写，这里保留re.I只是为了与原有的匹配结果严格一致
+RE_FC2 = re.compile(r'FC2[^A-Z\d]{0,5}(PPV[^A-Z\d]{0,5})?(\d{5,7})', re.I)
+RE_HEYDOUGA = re.compile(r'(HEYDOUGA)[-_]*(\d{4})[-_]0?(\d{3,5})', re.I)
+RE_GETCHU = re.compile(r'GETCHU[-_]*(\d+)', re.I)
+RE_GYUTTO = re.compile(r'GYUTTO-(\d+)', re.I)
+RE_259LUXU = re.compile(r'259LUXU-(\d+)', re.I)
+RE_DOMAIN = re.compile(r'\w{3,10}\.(COM|NET|APP|XYZ)', re.I)
+RE_HEY = re.compile(r'(?:HEY)[-_]*(\d{4})[-_]0?(\d{3,5})', re.I)
+RE_MUGEN = re.compile(r'(MKB?D)[-_]*(S\d{2,3})|(MK3D2DBD|S2M|S2MBD)[-_]*(\d{2,3})', re.I)
+RE_IBW = re.compile(r'(IBW)[-_](\d{2,5}z)', re.I)
+RE_NORMAL = re.compile(r'([A-Z]{2,10})[-_](\d{2,5})', re.I)
+RE_TOKYOHOT_OLD = re.compile(r'(RED[01]\d\d|SKY[0-3]\d\d|EX00[01]\d)', re.I)
+RE_NO_DASH = re.compile(r'([A-Z]{2,})(\d{2,5})', re.I)
+RE_TMA = re.compile(r'(T[23]8[-_]\d{3})')
+RE_TOKYOHOT_NK = re.compile(r'(N\d{4}|K\d{4})', re.I)
+RE_R18 = re.compile(r'R18-?\d{3}', re.I)
+RE_NUMERIC = re.compile(r'(\d{6}[-_]\d{2,3})')
+
+CD_POSTFIX = re.compile(r'([-_]\w|cd\d)$')
+RE_CID_CHARS = re.compile(r'^([a-z\d_]+)$', re.A)
+RE_CID_SIMPLE = re.compile(r'^[a-z\d]{7,19}$')
+RE_CID_UNDERSCORE = re.compile(r'''^h_\d{3,4}[a-z]{1,10}\d{2,5}[a-z\d]{0,8}$  # 约 99.17%
+                                |^\d{3}_\d{4,5}$                            # 约 0.57%
+                                |^402[a-z]{3,6}\d*_[a-z]{3,8}\d{5,6}$       # 约 0.09%
+                                |^h_\d{3,4}wvr\d\w\d{4,5}[a-z\d]{0,8}$      # 约 0.06%
+                                 $''', re.VERBOSE)
+RE_TYPE_FC2 = re.compile(r'^FC2-\d{5,7}$', re.I)
+RE_TYPE_GETCHU = re.compile(r'^GETCHU-(\d+)', re.I)
+RE_TYPE_GYUTTO = re.compile(r'^GYUTTO-(\d+)', re.I)
+
+# 每个文件名的匹配结果都会被缓存，限制缓存的条目数以免扫描超大的媒体库时占用过多内存
+CACHE_SIZE = 65536
+
+
+class IDExtractor:
+    """番号提取器：忽略模式在创建时编译一次，并按文件名缓存匹配结果"""
+    def __init__(self, ignored_id_pattern) -> None:
+        self.patterns = tuple(ignored_id_pattern)
+        self.ignore_pattern = re.compile('|'.join(self.patterns))
+        self.match_name = lru_cache(maxsize=CACHE_SIZE)(self._match_name)
+
+    def get_id(self, filepath_str: str) -> str:
+        """从给定的文件路径中提取番号（DVD ID）"""
+        filepath = Path(filepath_str)
+        avid = self.match_name(filepath.name)
+        if avid:
             return avid
-        # 匹配IBW这样带有后缀z的番号
-        match = re.search(r'(IBW)[-_](\d{2,5}z)', norm, re.I)
+        # 如果最后仍然匹配不了番号，则尝试使用文件所在文件夹的名字去匹配
+        if filepath.parent.name != '': # haven't reach '.' or '/'
+            return self.get_id(filepath.parent.name)
+        else:
+            return ''
+
+    def _match_name(self, name: str) -> str:
+        """仅根据文件名（不含文件夹）匹配番号，匹配不到时返回空字符串"""
+        norm = self.ignore_pattern.sub('', Path(name).stem).upper()
+        if 'FC2' in norm:
+            # 根据FC2 Club的影片数据，FC2编号为5-7个数字
+            match = RE_FC2.search(norm)
+            if match:
+                return 'FC2-' + match.group(2)
+        elif 'HEYDOUGA' in norm:
+            match = RE_HEYDOUGA.search(norm)
+            if match:
+                return '-'.join(match.groups())
+        elif 'GETCHU' in norm:
+            match = RE_GETCHU.search(norm)
+            if match:
+                return 'GETCHU-' + match.group(1)
+        elif 'GYUTTO' in norm:
+            match = RE_GYUTTO.search(norm)
+            if match:
+                return 'GYUTTO-' + match.group(1)
+        elif '259LUXU' in norm: # special case having form of '259luxu'
+            match = RE_259LUXU.search(norm)
+            if match:
+                return '259LUXU-' + match.group(1)
+
+        else:
+            # 先尝试移除可疑域名进行匹配，如果匹配不到再使用原始文件名进行匹配
+            no_domain = RE_DOMAIN.sub('', norm)
+            if no_domain != norm:
+                # norm中不含路径分隔符，因此不会再回退到文件夹名
+                avid = self.match_name(no_domain)
+                if avid:
+                    return avid
+            # 匹配缩写成hey的heydouga影片。由于番号分三部分，要先于后面分两部分的进行匹配
+            match = RE_HEY.search(norm)
+            if match:
+                return 'heydouga-' + '-'.join(match.groups())
+            # 匹配片商 MUGEN 的奇怪番号。由于MK3D2DBD的模式，要放在普通番号模式之前进行匹配
+            match = RE_MUGEN.search(norm)
+            if match:
+                if match.group(1) is not None:
+                    avid = match.group(1) + '-' + match.group(2)
+                else:
+                    avid = match.group(3) + '-' + match.group(4)
+                return avid
+            # 匹配IBW这样带有后缀z的番号
+            match = RE_IBW.search(norm)
+            if match:
+                return match.group(1) + '-' + match.group(2)
+            # 普通番号，优先尝试匹配带分隔符的（如ABC-123）
+            match = RE_NORMAL.search(norm)
+            if match:
+                return match.group(1) + '-' + match.group(2)
+            # 普通番号，运行到这里时表明无法匹配到带分隔符的番号
+            # 先尝试匹配东热的red, sky, ex三个不带-分隔符的系列
+            # （这三个系列已停止更新，因此根据其作品编号将数字范围限制得小一些以降低误匹配概率）
+            match = RE_TOKYOHOT_OLD.search(norm)
+            if match:
+                return match.group(1)
+            # 然后再将影片视作缺失了-分隔符来匹配
+            match = RE_NO_DASH.search(norm)
+            if match:
+                return match.group(1) + '-' + match.group(2)
+        # 尝试匹配TMA制作的影片（如'T28-557'，他家的番号很乱）
+        match = RE_TMA.search(norm)
         if match:
-            return match.group(1) + '-' + match.group(2)
-        # 普通番号，优先尝试匹配带分隔符的（如ABC-123）
-        match = re.search(r'([A-Z]{2,10})[-_](\d{2,5})', norm, re.I)
+            return match.group(1)
+        # 尝试匹配东热n, k系列
+        match = RE_TOKYOHOT_NK.search(norm)
         if match:
-            return match.group(1) + '-' + match.group(2)
-        # 普通番号，运行到这里时表明无法匹配到带分隔符的番号
-        # 先尝试匹配东热的red, sky, ex三个不带-分隔符的系列
-        # （这三个系列已停止更新，因此根据其作品编号将数字范围限制得小一些以降低误匹配概率）
-        match = re.search(r'(RED[01]\d\d|SKY[0-3]\d\d|EX00[01]\d)', norm, re.I)
+            return match.group(1)
+        # 尝试匹配R18-XXX的番号
+        match = RE_R18.search(norm)
         if match:
             return match.group(1)
-        # 然后再将影片视作缺失了-分隔符来匹配
-        match = re.search(r'([A-Z]{2,})(\d{2,5})', norm, re.I)
+        # 尝试匹配纯数字番号（无码影片）
+        match = RE_NUMERIC.search(norm)
         if match:
-            return match.group(1) + '-' + match.group(2)
-    # 尝试匹配TMA制作的影片（如'T28-557'，他家的番号很乱）
-    match = re.search(r'(T[23]8[-_]\d{3})', norm)
-    if match:
-        return match.group(1)
-    # 尝试匹配东热n, k系列
-    match = re.search(r'(N\d{4}|K\d{4})', norm, re.I)
-    if match:
-        return match.group(1)
-    # 尝试匹配R18-XXX的番号
-    match = re.search(r'R18-?\d{3}', norm, re.I)
-    if match:
-        return match.group(1)
-    # 尝试匹配纯数字番号（无码影片）
-    match = re.search(r'(\d{6}[-_]\d{2,3})', norm)
-    if match:
-        return match.group(1)
-    # 如果还是匹配不了，尝试将')('替换为'-'后再试，少部分影片的番号是由')('分隔的
-    if ')(' in norm:
-        avid = get_id(norm.replace(')(', '-'))
-        if avid:
-            return avid
-    # 如果最后仍然匹配不了番号，则尝试使用文件所在文件夹的名字去匹配
-    
-    if filepath.parent.name != '': # haven't reach '.' or '/'
-        return get_id(filepath.parent.name)
-    else:
+            return match.group(1)
+        # 如果还是匹配不了，尝试将')('替换为'-'后再试，少部分影片的番号是由')('分隔的
+        if ')(' in norm:
+            avid = self.match_name(norm.replace(')(', '-'))
+            if avid:
+                return avid
         return ''
 
+    def get_ids(self, filepath: str) -> Tuple[str, str, str]:
+        """一次性获取文件的番号、cid以及影片分类
+
+        Returns:
+            Tuple[str, str, str]: (dvdid, cid, av_type)。av_type为优先采用的番号（cid优先）的分类，
+            两者都无法识别时为空字符串
+        """
+        dvdid = self.get_id(filepath)
+        cid = get_cid(filepath)
+        # 如果文件名能匹配到cid，那么将cid视为有效id，因为此时dvdid多半是错的
+        avid = cid if cid else dvdid
+        av_type = guess_av_type(avid) if avid else ''
+        return dvdid, cid, av_type
+
+
+_extractor = None
+def get_extractor() -> IDExtractor:
+    """获取与当前配置对应的番号提取器（配置中的忽略模式变化时重新创建）"""
+    global _extractor
+    patterns = tuple(Cfg().scanner.ignored_id_pattern)
+    extractor = _extractor
+    if extractor is None or extractor.patterns != patterns:
+        extractor = IDExtractor(patterns)
+        _extractor = extractor
+    return extractor
+
+
+def get_id(filepath_str: str) -> str:
+    """从给定的文件路径中提取番号（DVD ID）"""
+    return get_extractor().get_id(filepath_str)
+
+
+def get_ids(filepath: str) -> Tuple[str, str, str]:
+    """一次性获取文件的(dvdid, cid, av_type)，参见IDExtractor.get_ids"""
+    return get_extractor().get_ids(filepath)
+
 
-CD_POSTFIX = re.compile(r'([-_]\w|cd\d)$')
 def get_cid(filepath: str) -> str:
     """尝试将给定的文件名匹配为CID（Content ID）"""
-    basename = os.path.splitext(os.path.basename(filepath))[0]
+    return _match_cid(os.path.splitext(os.path.basename(filepath))[0])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _match_cid(basename: str) -> str:
     # 移除末尾可能带有的分段影片序号
     possible = CD_POSTFIX.sub('', basename)
     # cid只由数字、小写字母和下划线组成
-    match = re.match(r'^([a-z\d_]+)$', possible, re.A)
+    match = RE_CID_CHARS.match(possible)
     if match:
         possible = match.group(1)
         if '_' not in possible:
             # 长度为7-14的cid就占了约99.01%. 最长的cid为24，但是长为20-24的比例不到十万分之五
-            match = re.match(r'^[a-z\d]{7,19}$', possible)
+            match = RE_CID_SIMPLE.match(possible)
             if match:
                 return possible
         else:
             # 绝大多数都只有一个下划线（只有约万分之一带有两个下划线）
-            match2 = re.match(r'''^h_\d{3,4}[a-z]{1,10}\d{2,5}[a-z\d]{0,8}$  # 约 99.17%
-                                |^\d{3}_\d{4,5}$                            # 约 0.57%
-                                |^402[a-z]{3,6}\d*_[a-z]{3,8}\d{5,6}$       # 约 0.09%
-                                |^h_\d{3,4}wvr\d\w\d{4,5}[a-z\d]{0,8}$      # 约 0.06%
-                                 $''', possible, re.VERBOSE)
+            match2 = RE_CID_UNDERSCORE.match(possible)
             if match2:
                 return possible
     return ''
 
 
+@lru_cache(maxsize=CACHE_SIZE)
 def guess_av_type(avid: str) -> str:
     """识别给定的番号所属的分类: normal, fc2, cid"""
-    match = re.match(r'^FC2-\d{5,7}$', avid, re.I)
+    match = RE_TYPE_FC2.match(avid)
     if match:
         return 'fc2'
-    match = re.match(r'^GETCHU-(\d+)',avid,re.I)
+    match = RE_TYPE_GETCHU.match(avid)
     if match:
         return 'getchu'
-    match = re.match(r'^GYUTTO-(\d+)',avid,re.I)
+    match = RE_TYPE_GYUTTO.match(avid)
     if match:
         return 'gyutto'
     # 如果传入的avid完全匹配cid的模式，则将影片归类为cid
@@ -0,0 +1,92 @@
+"""熔断器：站点连续出错时在一段时间内停止访问它，避免每部影片都要在无法访问的站点上耗费重试和超时的时间"""
+import time
+import logging
+import threading
+from enum import Enum
+
+
+from javsp.config import Cfg
+
+
+__all__ = ['BreakerState', 'CircuitBreaker', 'get_breaker']
+
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(Enum):
+    CLOSED = 'closed'           # 正常访问
+    OPEN = 'open'               # 暂停访问
+    HALF_OPEN = 'half_open'     # 冷却结束，允许一个试探性的请求
+
+
+class CircuitBreaker:
+    """单个站点的熔断器"""
+    def __init__(self, name: str, failure_threshold: int, cooldown: float) -> None:
+        """
+        Args:
+            name (str): 站点（抓取器）名称，用于输出日志
+            failure_threshold (int): 连续失败多少次后暂停访问（0表示永不暂停）
+            cooldown (float): 暂停访问多长时间（秒）后再次尝试
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = None
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """检查现在是否可以访问此站点"""
+        with self.lock:
+            now = time.monotonic()
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.OPEN:
+                if now - self.opened_at < self.cooldown:
+                    return False
+                self.state = BreakerState.HALF_OPEN
+                logger.debug(f"{self.name}: 冷却结束，尝试重新访问站点")
+            # 半开状态下只放行一个试探请求。如果试探请求迟迟没有结果（比如被取消），冷却时间过后再放行一个
+            if self.probe_at is not None and now - self.probe_at < self.cooldown:
+                return False
+            self.probe_at = now
+            return True
+
+    def record_success(self):
+        """站点正常响应（包括明确告知未找到影片）"""
+        with self.lock:
+            if self.state != BreakerState.CLOSED:
+                logger.info(f"{self.name}: 站点已恢复访问")
+            self.state = BreakerState.CLOSED
+            self.failures = 0
+            self.probe_at = None
+
+    def record_failure(self, fatal=False):
+        """站点出错。fatal为True表示出现了重试也无法解决的错误（如被站点屏蔽），此时直接暂停访问"""
+        if not self.failure_threshold:
+            return
+        with self.lock:
+            self.failures = self.failure_threshold if fatal else self.failures + 1
+            if self.state == BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != BreakerState.OPEN:
+                    logger.warning(f"{self.name}: 站点连续出错，将在{self.cooldown:.0f}秒内跳过此站点")
+                self.state = BreakerState.OPEN
+                self.opened_at = time.monotonic()
+                self.probe_at = None
+
+
+_breakers = {}
+_lock = threading.Lock()
+def get_breaker(name: str) -> CircuitBreaker:
+    """获取指定站点的熔断器（在整个运行期间共享）"""
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            cfg = Cfg().crawler.circuit_breaker
+            threshold = cfg.failure_threshold if cfg.enabled else 0
+            breaker = CircuitBreaker(name, threshold, cfg.cooldown.total_seconds())
+            _breakers[name] = breaker
+        return breaker
@@ -2,13 +2,23 @@ from argparse import ArgumentParser, RawTextHelpFormatter
 from enum import Enum
 from typing import Dict, List, Literal, TypeAlias, Union
 from confz import BaseConfig, CLArgSource, EnvSource, FileSource
-from pydantic import ByteSize, Field, NonNegativeInt, PositiveInt
+from pydantic import ByteSize, Field, NonNegativeFloat, NonNegativeInt, PositiveInt
 from pydantic_extra_types.pendulum_dt import Duration
 from pydantic_core import Url
 from pathlib import Path
 
 from javsp.lib import resource_path
 
+class ScanIndexConfig(BaseConfig):
+    enabled: bool
+    incremental: bool
+
+class WatchConfig(BaseConfig):
+    enabled: bool
+    settle_time: Duration
+    poll_interval: Duration
+    use_inotify: bool
+
 class Scanner(BaseConfig):
     ignored_id_pattern: List[str]
     input_directory: Path | None = None
@@ -16,6 +26,10 @@ class Scanner(BaseConfig):
     ignored_folder_name_pattern: List[str]
     minimum_size: ByteSize
     skip_nfo_dir: bool
+    scan_workers: PositiveInt = 8
+    index: ScanIndexConfig
+    watch: WatchConfig
+    streaming: bool = True
     manual: bool
 
 class CrawlerID(str, Enum):
@@ -39,11 +53,44 @@ class CrawlerID(str, Enum):
     arzon = 'arzon'
     arzon_iv = 'arzon_iv'
 
+class RateLimit(BaseConfig):
+    rate: NonNegativeFloat
+    burst: PositiveInt = 1
+
+class Politeness(BaseConfig):
+    default: RateLimit
+    sites: Dict[str, RateLimit] = {}
+
+class Concurrency(BaseConfig):
+    default: NonNegativeInt
+    sites: Dict[CrawlerID, NonNegativeInt] = {}
+
+class SessionPoolConfig(BaseConfig):
+    pool_connections: PositiveInt = 4
+    pool_maxsize: PositiveInt = 10
+    keep_alive: bool = True
+
+class PersistCookies(BaseConfig):
+    enabled: bool
+    session_ttl: Duration
+
+class ResponseCacheConfig(BaseConfig):
+    enabled: bool
+    ttl: Duration
+    sites: Dict[str, Duration] = {}
+    max_size: ByteSize
+
 class Network(BaseConfig):
     proxy_server: Url | None
     retry: NonNegativeInt = 3
     timeout: Duration
     proxy_free: Dict[CrawlerID, Url]
+    proxy_free_ttl: Duration
+    politeness: Politeness
+    concurrency: Concurrency
+    session: SessionPoolConfig
+    cache: ResponseCacheConfig
+    persist_cookies: PersistCookies
 
 class CrawlerSelect(BaseConfig):
     def items(self) -> List[tuple[str, list[CrawlerID]]]:
@@ -106,15 +153,52 @@ class UseJavDBCover(str, Enum):
     no = "no"
     fallback = "fallback"
 
+class InfoCacheConfig(BaseConfig):
+    enabled: bool
+    ttl: Duration
+
+class MissCacheConfig(BaseConfig):
+    enabled: bool
+    ttl: Duration
+    max_ttl: Duration
+
+class CircuitBreakerConfig(BaseConfig):
+    enabled: bool
+    failure_threshold: PositiveInt = 3
+    cooldown: Duration
+
+class AdaptiveSelection(BaseConfig):
+    enabled: bool
+    min_samples: PositiveInt = 10
+    min_hit_rate: float = Field(ge=0, le=1)
+    explore: float = Field(ge=0, le=1)
+    window: Duration
+
+class LabelRouting(BaseConfig):
+    enabled: bool
+    min_misses: PositiveInt = 2
+    explore: float = Field(ge=0, le=1)
+
+class ActressAlias(BaseConfig):
+    fuzzy_match: bool
+    user_files: List[Path] = []
+
 class Crawler(BaseConfig):
     selection: CrawlerSelect
     required_keys: list[MovieInfoField]
+    early_completion: bool
+    desired_keys: list[MovieInfoField] = []
     hardworking: bool
     respect_site_avid: bool
     fc2fan_local_path: Path | None
-    sleep_after_scraping: Duration
     use_javdb_cover: UseJavDBCover
     normalize_actress_name: bool
+    actress_alias: ActressAlias
+    info_cache: InfoCacheConfig
+    miss_cache: MissCacheConfig
+    circuit_breaker: CircuitBreakerConfig
+    adaptive_selection: AdaptiveSelection
+    label_routing: LabelRouting
 
 class MovieDefault(BaseConfig):
     title: str
@@ -143,7 +227,6 @@ class NFOSummarize(BaseConfig):
 
 class ExtraFanartSummarize(BaseConfig):
     enabled: bool
-    scrap_interval: Duration
 
 class SlimefaceEngine(BaseConfig):
     name: Literal['slimeface']
@@ -210,10 +293,20 @@ class Translator(BaseConfig):
     engine: TranslateEngine = Field(..., discriminator='name')
     fields: TranslateField
 
+class Pipeline(BaseConfig):
+    enabled: bool
+    crawl_workers: PositiveInt = 1
+    translate_workers: PositiveInt = 1
+    image_workers: PositiveInt = 2
+    file_workers: PositiveInt = 1
+    queue_size: NonNegativeInt = 2
+
 class Other(BaseConfig):
     interactive: bool
     check_update: bool
     auto_update: bool
+    pipeline: Pipeline
+    data_dir: Path | None = None
 
 def get_config_source():
     parser = ArgumentParser(prog='JavSP', description='汇总多站点数据的AV元数据刮削器', formatter_class=RawTextHelpFormatter)
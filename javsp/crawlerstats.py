@@ -0,0 +1,148 @@
+"""统计各个抓取器的命中率、耗时和提供的字段，并据此调整抓取器的选择"""
+import re
+import time
+import random
+import logging
+import threading
+from typing import Dict, List
+
+
+from javsp.config import Cfg
+from javsp.datatype import MovieInfo
+from javsp.storage import SQLiteDB
+
+
+__all__ = ['get_prefix', 'CrawlerStats', 'crawler_stats']
+
+
+logger = logging.getLogger(__name__)
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS crawl (
+    crawler TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    found INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    fields TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_prefix ON crawl (prefix, crawler);
+'''
+# 统计提供的字段时忽略的属性
+IGNORED_FIELDS = ('dvdid', 'cid', 'url')
+
+
+def get_prefix(movie_id: str) -> str:
+    """提取番号的前缀（如'ABC-123'的'ABC'），没有字母前缀的番号（如'082713-417'）统一归入'#'
+
+    素人番号开头的数字和cid开头的'h_'、数字会被忽略（如'259LUXU-1234'、'h_1234abc00123'的前缀分别为'LUXU'、'ABC'）
+    """
+    match = re.match(r'(?:h_)?\d*([a-z]+)', movie_id or '', re.I)
+    return match.group(1).upper() if match else '#'
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+class CrawlerStats:
+    """按抓取器和番号前缀记录每次抓取的结果"""
+    def __init__(self, path='crawler_stats.db') -> None:
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        """是否根据统计数据选择抓取器（统计数据总是会记录）"""
+        return Cfg().crawler.adaptive_selection.enabled
+
+    @property
+    def db(self) -> SQLiteDB:
+        with self._lock:
+            if self._db is None:
+                self._db = SQLiteDB(self.path, SCHEMA)
+                # 只保留统计窗口内的记录，使统计结果能够反映站点的近况
+                window = Cfg().crawler.adaptive_selection.window.total_seconds()
+                self._db.execute('DELETE FROM crawl WHERE time<?', (time.time() - window,))
+            return self._db
+
+    def record(self, crawler: str, movie_id: str, info: MovieInfo, found: bool, latency: float):
+        """记录一次抓取的结果（found为False表示站点明确告知未找到影片）
+
+        movie_id应当是抓取前的番号，因为抓取器会使用站点上的番号覆盖info中的番号。
+        未启用自适应选择时也会记录，以便通过tools/crawler_stats.py查看并决定是否启用
+        """
+        fields = []
+        if found:
+            fields = [k for k, v in info.to_dict().items() if v and k not in IGNORED_FIELDS]
+        prefix = get_prefix(movie_id)
+        self.db.execute('INSERT INTO crawl VALUES (?, ?, ?, ?, ?, ?)',
+                        (crawler, prefix, int(found), latency, ','.join(fields), time.time()))
+
+    def summary(self, prefix: str = None) -> Dict[str, Dict[str, dict]]:
+        """汇总统计数据
+
+        Returns:
+            dict: {前缀: {抓取器: {'samples', 'hit_rate', 'p50', 'p95', 'fields'}}}
+        """
+        if prefix is None:
+            rows = self.db.execute('SELECT prefix, crawler, found, latency, fields FROM crawl')
+        else:
+            rows = self.db.execute('SELECT prefix, crawler, found, latency, fields FROM crawl WHERE prefix=?', (prefix,))
+        grouped = {}
+        for pre, crawler, found, latency, fields in rows:
+            grouped.setdefault(pre, {}).setdefault(crawler, []).append((found, latency, fields))
+        result = {}
+        for pre, crawlers in grouped.items():
+            result[pre] = {}
+            for crawler, records in crawlers.items():
+                hits = [r for r in records if r[0]]
+                latencies = [r[1] for r in records]
+                field_count = {}
+                for r in hits:
+                    for f in filter(None, r[2].split(',')):
+                        field_count[f] = field_count.get(f, 0) + 1
+                result[pre][crawler] = {
+                    'samples': len(records),
+                    'hit_rate': len(hits) / len(records),
+                    'p50': _percentile(latencies, 0.5),
+                    'p95': _percentile(latencies, 0.95),
+                    'fields': {f: c / len(hits) for f, c in field_count.items()},
+                }
+        return result
+
+    def select(self, crawlers: List[str], movie_id: str) -> List[str]:
+        """根据统计数据筛选抓取器并排序：跳过几乎从未找到过此前缀影片的站点，其余站点按命中率和耗时排序
+
+        Args:
+            crawlers (List[str]): 按配置的优先级排列的抓取器
+            movie_id (str): 影片的番号
+
+        Returns:
+            List[str]: 应当访问的抓取器，越可能尽快获取到数据的越靠前
+        """
+        cfg = Cfg().crawler.adaptive_selection
+        stats = self.summary(get_prefix(movie_id)).get(get_prefix(movie_id), {})
+        selected = []
+        for name in crawlers:
+            s = stats.get(name)
+            if s and s['samples'] >= cfg.min_samples and s['hit_rate'] < cfg.min_hit_rate:
+                # 偶尔仍然访问被跳过的站点，以便它开始收录此类影片时能够被发现
+                if random.random() >= cfg.explore:
+                    logger.debug(f"{name}: 此站点很少能找到'{get_prefix(movie_id)}'系列的影片，跳过")
+                    continue
+            selected.append(name)
+
+        def sort_key(name):
+            s = stats.get(name)
+            if not s or s['samples'] < cfg.min_samples:
+                # 样本不足的站点视为最有希望的站点，以便尽快积累样本
+                return (-1.0, 0.0)
+            return (-s['hit_rate'], s['p50'])
+        return sorted(selected, key=sort_key)
+
+
+crawler_stats = CrawlerStats()
@@ -1,4 +1,7 @@
-from PIL.Image import Image
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from PIL.Image import Image
 from abc import ABC, abstractmethod
 class Cropper(ABC):
     @abstractmethod
@@ -1,4 +1,7 @@
-from PIL import Image
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from PIL import Image
 from javsp.cropper.interface import Cropper, DefaultCropper
 from javsp.cropper.utils import get_bound_box_by_face
 
@@ -17,6 +20,7 @@ class SlimefaceCropper(Cropper):
 
 if __name__ == '__main__':
     from argparse import ArgumentParser
+    from PIL import Image
 
     arg_parser = ArgumentParser(prog='slimeface crop')
 
@@ -6,7 +6,7 @@ import shutil
 import logging
 from functools import cached_property
 
-from javsp.config import Cfg
+from javsp.config import Cfg, MovieInfoField
 from javsp.lib import resource_path, detect_special_attr
 
 
@@ -14,6 +14,21 @@ logger = logging.getLogger(__name__)
 filemove_logger = logging.getLogger('filemove')
 
 class MovieInfo:
+    # 抓取器获取的字段，汇总、缓存和导出数据时都只处理这些字段
+    FIELDS = tuple(i.value for i in MovieInfoField)
+    # 汇总数据及之后的处理过程中才会赋值的字段
+    EXTRA_FIELDS = (
+        'covers',           # 所有来源的封面图片（URL），按优先级排序
+        'big_covers',       # 所有来源的高清封面图片（URL）
+        'title_break',      # 翻译引擎返回的标题断句
+        'ori_title_break',  # 翻译引擎返回的原始标题断句
+        'ori_plot',         # 原始故事情节，仅在简介被翻译过时才对此字段赋值
+        'nfo_title',        # nfo文件中的影片标题
+        'label',            # 番号前缀，用于判断裁剪封面的方式
+        'success',          # 抓取器是否成功获取了数据
+    )
+    __slots__ = FIELDS + EXTRA_FIELDS
+
     def __init__(self, dvdid: str = None, /, *, cid: str = None, from_file=None):
         """
         Args:
@@ -52,6 +67,14 @@ class MovieInfo:
         self.publish_date = None    # 发布日期
         self.preview_pics = None    # 预览图片（URL）
         self.preview_video = None   # 预览视频（URL）
+        self.covers = None
+        self.big_covers = None
+        self.title_break = None
+        self.ori_title_break = None
+        self.ori_plot = None
+        self.nfo_title = None
+        self.label = None
+        self.success = False
 
         if from_file:
             if os.path.isfile(from_file):
@@ -60,7 +83,7 @@ class MovieInfo:
                 raise TypeError(f"Invalid file path: '{from_file}'")
 
     def __str__(self) -> str:
-        d = vars(self)
+        d = self.to_dict()
         return json.dumps(d, indent=2, ensure_ascii=False)
 
     def __repr__(self) -> str:
@@ -72,7 +95,7 @@ class MovieInfo:
 
     def __eq__(self, other) -> bool:
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
         else:
             return False
 
@@ -87,14 +110,20 @@ class MovieInfo:
         with open(filepath, 'wt', encoding='utf-8') as f:
             f.write(str(self))
 
+    def to_dict(self) -> dict:
+        """导出抓取器获取的字段"""
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+    def update(self, d: dict) -> None:
+        """使用字典中的数据更新对象属性（忽略未知的字段）"""
+        for k in self.FIELDS:
+            if k in d:
+                setattr(self, k, d[k])
+
     def load(self, filepath) -> None:
         with open(filepath, 'rt', encoding='utf-8') as f:
             d = json.load(f)
-        # 更新对象属性
-        attrs = vars(self).keys()
-        for k, v in d.items():
-            if k in attrs:
-                self.__setattr__(k, v)
+        self.update(d)
 
     def get_info_dic(self):
         """生成用来填充模板的字典"""
@@ -137,6 +166,7 @@ class Movie:
         self.nfo_file = None            # nfo文件的路径
         self.fanart_file = None         # fanart文件的路径
         self.poster_file = None         # poster文件的路径
+        self.sub_file = None            # 影片所在文件夹中与番号匹配的外挂字幕文件
         self.guid = None                # GUI使用的唯一标识，通过dvdid和files做md5生成
 
     @cached_property
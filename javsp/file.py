@@ -6,85 +6,64 @@ import ctypes
 import logging
 import itertools
 import json
+import time
+import threading
 from sys import platform
-from typing import List
+from typing import Dict, List, NamedTuple, Tuple, Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 
-__all__ = ['scan_movies', 'get_fmt_size', 'get_remaining_path_len', 'replace_illegal_chars', 'get_failed_when_scan', 'find_subtitle_in_dir']
+__all__ = ['scan_movies', 'iter_movies', 'walk_tree', 'ScannedFile', 'get_fmt_size', 'get_remaining_path_len', 'replace_illegal_chars', 'get_failed_when_scan', 'find_subtitle_in_dir', 'subtitle_index']
 
 
 from javsp.avid import *
 from javsp.lib import re_escape
 from javsp.config import Cfg
 from javsp.datatype import Movie
+from javsp.scanindex import FileRecord, DirRecord, ScanIndex, scan_index
 
 logger = logging.getLogger(__name__)
 failed_items = []
+# 已经报告过错误的文件。监视模式下每批新影片都会重新扫描整个文件夹，同样的错误只报告一次
+_reported_files = set()
+
+
+class ScannedFile(NamedTuple):
+    """扫描到的文件。avid, av_type和status来自扫描索引（未使用索引或文件有变化时为默认值）"""
+    name: str
+    path: str
+    size: int
+    mtime: int
+    inode: int
+    avid: str = None
+    av_type: str = None
+    status: str = ScanIndex.NEW
 
 
 def scan_movies(root: str) -> List[Movie]:
-    """获取文件夹内的所有影片的列表（自动探测同一文件夹内的分片）"""
+    """获取文件夹内的所有影片的列表（自动探测同一文件夹内的分片）
+
+    启用扫描索引时，返回的文件路径均为绝对路径；增量模式下只返回有新增或变化的文件、或尚未整理成功的影片
+    """
     # 由于实现的限制: 
     # 1. 以数字编号最多支持10个分片，字母编号最多支持26个分片
     # 2. 允许分片间的编号有公共的前导符（如编号01, 02, 03），因为求prefix时前导符也会算进去
 
     # 扫描所有影片文件并获取它们的番号
     dic = {}    # avid: [abspath1, abspath2...]
+    av_types = {}   # avid: av_type
     small_videos = {}
-    ignore_folder_name_pattern = re.compile('|'.join(Cfg().scanner.ignored_folder_name_pattern))
-    for dirpath, dirnames, filenames in os.walk(root):
-        for name in dirnames.copy():
-            if ignore_folder_name_pattern.match(name):
-                dirnames.remove(name)
-            # 移除有nfo的文件夹
-            if Cfg().scanner.skip_nfo_dir:
-                if any(file.lower().endswith(".nfo") for file in os.listdir(os.path.join(dirpath, name)) if isinstance(file, str)):
-                    print(f"skip file {name}")
-                    dirnames.remove(name)
-
-        for file in filenames:
-            ext = os.path.splitext(file)[1].lower()
-            if ext in Cfg().scanner.filename_extensions:
-                fullpath = os.path.join(dirpath, file)
-                # 忽略小于指定大小的文件
-                filesize = os.path.getsize(fullpath)
-                if filesize < Cfg().scanner.minimum_size:
-                    small_videos.setdefault(file, []).append(fullpath)
-                    continue
-                dvdid = get_id(fullpath)
-                cid = get_cid(fullpath)
-                # 如果文件名能匹配到cid，那么将cid视为有效id，因为此时dvdid多半是错的
-                avid = cid if cid else dvdid
-                if avid:
-                    if avid in dic:
-                        dic[avid].append(fullpath)
-                    else:
-                        dic[avid] = [fullpath]
-                else:
-                    fail = Movie('无法识别番号')
-                    fail.files = [fullpath]
-                    failed_items.append(fail)
-                    logger.error(f"无法提取影片番号: '{fullpath}'")
+    scanner = _MovieScanner(root)
+    root = scanner.root
+    for _, dir_dic, dir_types, dir_small in scanner.scan_dirs():
+        for avid, files in dir_dic.items():
+            dic.setdefault(avid, []).extend(files)
+        av_types.update(dir_types)
+        for name, files in dir_small.items():
+            small_videos.setdefault(name, []).extend(files)
     # 多分片影片容易有文件大小低于阈值的子片，进行特殊处理
-    has_avid = {}
-    for name in list(small_videos.keys()):
-        dvdid = get_id(name)
-        cid = get_cid(name)
-        avid = cid if cid else dvdid
-        if avid in dic:
-            dic[avid].extend(small_videos.pop(name))
-        elif avid:
-            has_avid[name] = avid
-    # 对于前面忽略的视频生成一个简单的提示
-    small_videos = {k:sorted(v) for k,v in sorted(small_videos.items())}
-    skipped_files = list(itertools.chain(*small_videos.values()))
-    skipped_cnt = len(skipped_files)
-    if skipped_cnt > 0:
-        if len(has_avid) > 0:
-            logger.info(f"跳过了 {', '.join(has_avid)} 等{skipped_cnt}个小于指定大小的视频文件")
-        else:
-            logger.info(f"跳过了{skipped_cnt}个小于指定大小的视频文件")
-        logger.debug('跳过的视频文件如下:\n' + '\n'.join(skipped_files))
+    has_avid = _merge_small_videos(dic, small_videos)
+    _report_small_videos(small_videos, has_avid)
     # 检查是否有多部影片对应同一个番号
     non_slice_dup = {}  # avid: [abspath1, abspath2...]
     for avid, files in dic.copy().items():
@@ -97,42 +76,19 @@ def scan_movies(root: str) -> List[Movie]:
             non_slice_dup[avid] = files
             del dic[avid]
             continue
-        # 提取分片信息（如果正则替换成功，只会剩下单个小写字符）。相关变量都要使用同样的列表生成顺序
-        basenames = [os.path.basename(i) for i in files]
-        prefix = os.path.commonprefix(basenames)
-        try:
-            pattern_expr = re_escape(prefix) + r'\s*([a-z\d])\s*'
-            pattern = re.compile(pattern_expr, flags=re.I)
-        except re.error:
-            logger.debug(f"正则识别影片分片信息时出错: '{pattern_expr}'")
-            del dic[avid]
-            continue
-        remaining = [pattern.sub(r'\1', i).lower() for i in basenames]
-        postfixes = [i[1:] for i in remaining]
-        slices = [i[0] for i in remaining]
-        # 如果有不同的后缀，说明有文件名不符合正则表达式条件（没有发生替换或不带分片信息）
-        if (len(set(postfixes)) != 1
-            # remaining为初步提取的分片信息，不允许有重复值
-            or len(slices) != len(set(slices))):
-            logger.debug(f"无法识别分片信息: {prefix=}, {remaining=}")
+        mapped_files = _sort_slices(files)
+        if mapped_files is None:
             non_slice_dup[avid] = files
             del dic[avid]
             continue
-        # 影片编号必须从 0/1/a 开始且编号连续
-        sorted_slices = sorted(slices)
-        first, last = sorted_slices[0], sorted_slices[-1]
-        if (first not in ('0', '1', 'a')) or (ord(last) != (ord(first)+len(sorted_slices)-1)):
-            logger.debug(f"无效的分片起始编号或分片编号不连续: {sorted_slices=}")
-            non_slice_dup[avid] = files
-            del dic[avid]
-            continue
-        # 生成最终的分片信息
-        mapped_files = [files[slices.index(i)] for i in sorted_slices]
         dic[avid] = mapped_files
 
     # 汇总输出错误提示信息
     msg = ''
     for avid, files in non_slice_dup.items():
+        if _reported_files.issuperset(files):
+            continue
+        _reported_files.update(files)
         msg += f'{avid}: \n'
         for f in files:
             msg += ('  ' + os.path.relpath(f, root) + '\n')
@@ -141,7 +97,151 @@ def scan_movies(root: str) -> List[Movie]:
     # 转换数据的组织格式
     movies: List[Movie] = []
     for avid, files in dic.items():
-        src = guess_av_type(avid)
+        movies.append(scanner.make_movie(avid, files, av_types[avid]))
+    if scanner.incremental:
+        # 增量模式: 略过所有文件都已整理成功且没有变化的影片
+        count = len(movies)
+        movies = [i for i in movies if not scanner.is_done(i)]
+        if count > len(movies):
+            logger.info(f'增量模式: 略过了{count - len(movies)}部已整理过的影片')
+    return movies
+
+
+def iter_movies(root: str) -> Iterator[Movie]:
+    """边扫描边返回影片：每个文件夹扫描完成后，立即返回其中识别到的影片（包括同一文件夹内的分片）
+
+    与scan_movies的区别在于，同一番号的影片出现在多个文件夹中时，scan_movies会全部略过，
+    而这里只能略过后扫描到的那些（先扫描到的已经返回了）
+    """
+    scanner = _MovieScanner(root)
+    seen = {}   # avid: 影片所在的文件夹
+    skipped = {}
+    has_avid = {}
+    skipped_movies = 0
+    # 边扫描边整理时，影片的整理结果会立即写入扫描索引，因此每个文件夹的记录要在返回其中的影片之前写入
+    dirs = scanner.scan_dirs(save_early=True)
+    try:
+        for dirpath, dic, av_types, small_videos in dirs:
+            has_avid.update(_merge_small_videos(dic, small_videos))
+            for name, files in small_videos.items():
+                skipped.setdefault(name, []).extend(files)
+            for avid, files in dic.items():
+                if avid in seen:
+                    logger.error(f"番号 {avid} 在多个文件夹中都有对应的影片文件，已略过整理: '{dirpath}' (已在 '{seen[avid]}' 中找到)")
+                    continue
+                seen[avid] = dirpath
+                if len(files) > 1:
+                    mapped_files = _sort_slices(files)
+                    if mapped_files is None:
+                        relpaths = [os.path.relpath(i, scanner.root) for i in files]
+                        logger.error(f"番号 {avid} 对应多部影片文件且不符合分片规则，已略过整理: {relpaths}")
+                        continue
+                    files = mapped_files
+                movie = scanner.make_movie(avid, files, av_types[avid])
+                if scanner.incremental and scanner.is_done(movie):
+                    skipped_movies += 1
+                    continue
+                yield movie
+    finally:
+        # 提前停止迭代（如整理出错）时也要保存扫描索引
+        dirs.close()
+    _report_small_videos(skipped, has_avid)
+    if skipped_movies:
+        logger.info(f'增量模式: 略过了{skipped_movies}部已整理过的影片')
+
+
+class _MovieScanner:
+    """扫描文件夹并识别各个影片文件的番号（scan_movies和iter_movies共用）"""
+    def __init__(self, root: str) -> None:
+        self.extensions = Cfg().scanner.filename_extensions
+        self.video_extensions = frozenset(self.extensions)
+        # 扫描影片的同时也记录字幕文件
+        self.all_extensions = list(self.extensions) + [i for i in SUB_EXTENSIONS if i not in self.video_extensions]
+        self.use_index = scan_index.enabled()
+        self.incremental = self.use_index and Cfg().scanner.index.incremental
+        self.records = None
+        if self.use_index:
+            # 索引中以绝对路径记录各个文件夹
+            root = os.path.abspath(root)
+            self.records = scan_index.load(ScanIndex.fingerprint(self.all_extensions))
+        self.root = root
+        self.status = {}    # abspath: 索引中记录的整理状态
+        self.new_ids = {}   # abspath: (avid, av_type)，需要写入索引的番号
+
+    def scan_dirs(self, save_early=False):
+        """逐个文件夹识别影片文件的番号
+
+        Args:
+            save_early (bool, optional): 是否在返回每个文件夹之前就将其记录写入扫描索引（否则在扫描结束时一起写入）
+
+        Yields:
+            (dirpath, {avid: [files]}, {avid: av_type}, {filename: [小于指定大小的文件]})
+        """
+        walker = _TreeWalker(self.all_extensions, Cfg().scanner.scan_workers, self.records,
+                             Cfg().scanner.minimum_size, self.extensions)
+        saved = set()   # 已经写入扫描索引的文件夹
+        completed = False
+        try:
+            for dirpath, files in walker.walk(self.root):
+                dic, av_types, small_videos = {}, {}, {}
+                for file in files:
+                    if os.path.splitext(file.name)[1].lower() not in self.video_extensions:
+                        self.add_subtitle(file)
+                        continue
+                    fullpath = file.path
+                    self.status[fullpath] = file.status
+                    # 忽略小于指定大小的文件
+                    if file.size < Cfg().scanner.minimum_size:
+                        small_videos.setdefault(file.name, []).append(fullpath)
+                        continue
+                    if file.avid is not None:
+                        avid, av_type = file.avid, file.av_type
+                    else:
+                        dvdid, cid, av_type = get_ids(fullpath)
+                        # 如果文件名能匹配到cid，那么将cid视为有效id，因为此时dvdid多半是错的
+                        avid = cid if cid else dvdid
+                        self.new_ids[fullpath] = (avid, av_type)
+                    if avid:
+                        av_types[avid] = av_type
+                        if avid in dic:
+                            dic[avid].append(fullpath)
+                        else:
+                            dic[avid] = [fullpath]
+                    elif fullpath not in _reported_files:
+                        _reported_files.add(fullpath)
+                        fail = Movie('无法识别番号')
+                        fail.files = [fullpath]
+                        failed_items.append(fail)
+                        logger.error(f"无法提取影片番号: '{fullpath}'")
+                record = walker.changed_by_path.get(dirpath)
+                # 只有包含影片的文件夹需要提前写入，其余的留到最后一起写入
+                if save_early and dic and record is not None:
+                    scan_index.save_dirs([record], self.new_ids)
+                    saved.add(dirpath)
+                yield dirpath, dic, av_types, small_videos
+            completed = True
+            # 只有完整扫描过的文件夹，其中（包括子文件夹）的字幕才都已经记录在字幕索引中
+            subtitle_index.add_root(self.root)
+        finally:
+            if self.use_index:
+                # 包括被跳过的（有nfo的）文件夹，以及提前停止扫描时已经读取但尚未返回的文件夹
+                scan_index.save_dirs([i for i in walker.changed if i.path not in saved], self.new_ids)
+                # 未完整扫描时，无法确定没有扫描到的文件夹是否已被删除
+                if completed:
+                    scan_index.remove_missing(self.root, walker.visited, self.records)
+
+    def add_subtitle(self, file: ScannedFile):
+        """将字幕文件加入字幕索引"""
+        if file.avid is not None:
+            match_id = file.avid
+        else:
+            match_id = get_id(os.path.splitext(file.name)[0])
+            self.new_ids[file.path] = (match_id, None)
+        if match_id:
+            subtitle_index.add(match_id, file.path)
+
+    @staticmethod
+    def make_movie(avid: str, files: List[str], src: str) -> Movie:
         if src != 'cid':
             mov = Movie(avid)
         else:
@@ -151,8 +251,215 @@ def scan_movies(root: str) -> List[Movie]:
         mov.files = files
         mov.data_src = src
         logger.debug(f'影片数据源类型: {avid}: {src}')
-        movies.append(mov)
-    return movies
+        return mov
+
+    def is_done(self, movie: Movie) -> bool:
+        """影片的所有文件是否都已整理成功且没有变化"""
+        return all(self.status.get(f) == ScanIndex.DONE for f in movie.files)
+
+
+def _merge_small_videos(dic: dict, small_videos: dict) -> dict:
+    """将小于指定大小的分片并入对应的影片（会从small_videos中移除它们），返回其余能识别出番号的文件"""
+    has_avid = {}
+    for name in list(small_videos.keys()):
+        dvdid, cid, _ = get_ids(name)
+        avid = cid if cid else dvdid
+        if avid in dic:
+            dic[avid].extend(small_videos.pop(name))
+        elif avid:
+            has_avid[name] = avid
+    return has_avid
+
+
+def _report_small_videos(small_videos: dict, has_avid: dict):
+    """对于前面忽略的视频生成一个简单的提示"""
+    small_videos = {k:sorted(v) for k,v in sorted(small_videos.items())}
+    skipped_files = list(itertools.chain(*small_videos.values()))
+    skipped_cnt = len(skipped_files)
+    if skipped_cnt > 0:
+        if len(has_avid) > 0:
+            logger.info(f"跳过了 {', '.join(has_avid)} 等{skipped_cnt}个小于指定大小的视频文件")
+        else:
+            logger.info(f"跳过了{skipped_cnt}个小于指定大小的视频文件")
+        logger.debug('跳过的视频文件如下:\n' + '\n'.join(skipped_files))
+
+
+def _sort_slices(files: List[str]) -> List[str] | None:
+    """识别同一文件夹内的多个分片，返回按分片编号排序后的文件列表，无法识别时返回None"""
+    # 提取分片信息（如果正则替换成功，只会剩下单个小写字符）。相关变量都要使用同样的列表生成顺序
+    basenames = [os.path.basename(i) for i in files]
+    prefix = os.path.commonprefix(basenames)
+    try:
+        pattern_expr = re_escape(prefix) + r'\s*([a-z\d])\s*'
+        pattern = re.compile(pattern_expr, flags=re.I)
+    except re.error:
+        logger.debug(f"正则识别影片分片信息时出错: '{pattern_expr}'")
+        return None
+    remaining = [pattern.sub(r'\1', i).lower() for i in basenames]
+    postfixes = [i[1:] for i in remaining]
+    slices = [i[0] for i in remaining]
+    # 如果有不同的后缀，说明有文件名不符合正则表达式条件（没有发生替换或不带分片信息）
+    if (len(set(postfixes)) != 1
+        # remaining为初步提取的分片信息，不允许有重复值
+        or len(slices) != len(set(slices))):
+        logger.debug(f"无法识别分片信息: {prefix=}, {remaining=}")
+        return None
+    # 影片编号必须从 0/1/a 开始且编号连续
+    sorted_slices = sorted(slices)
+    first, last = sorted_slices[0], sorted_slices[-1]
+    if (first not in ('0', '1', 'a')) or (ord(last) != (ord(first)+len(sorted_slices)-1)):
+        logger.debug(f"无效的分片起始编号或分片编号不连续: {sorted_slices=}")
+        return None
+    # 生成最终的分片信息
+    return [files[slices.index(i)] for i in sorted_slices]
+
+
+class _TreeWalker:
+    """使用线程池并行地扫描各个子文件夹，每个文件夹只调用一次scandir
+
+    提供了扫描索引的记录时，修改时间没有变化的文件夹直接使用记录中的内容，不再调用scandir
+    """
+    def __init__(self, extensions, workers: int, records: Dict[str, DirRecord] = None, recheck_below: int = 0, recheck_extensions=None) -> None:
+        """
+        Args:
+            extensions (list of str): 要返回的文件的扩展名
+            workers (int): 线程数
+            records (Dict[str, DirRecord], optional): 扫描索引中的记录，为None时不使用索引
+            recheck_below (int, optional): 即使文件夹没有变化，也要重新检查小于此大小的文件（它们可能还在下载中）
+            recheck_extensions (list of str, optional): 需要重新检查的文件的扩展名，默认与extensions相同
+        """
+        self.extensions = frozenset(extensions)
+        self.ignore_pattern = re.compile('|'.join(Cfg().scanner.ignored_folder_name_pattern))
+        self.skip_nfo_dir = Cfg().scanner.skip_nfo_dir
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='scanner')
+        self.records = records
+        self.recheck_below = recheck_below
+        self.recheck_extensions = frozenset(recheck_extensions or extensions)
+        # 本次重新读取过的文件夹的记录，以及扫描到的所有文件夹（仅在使用索引时记录）
+        self.changed: List[DirRecord] = []
+        self.changed_by_path: Dict[str, DirRecord] = {}
+        self.visited: List[str] = []
+
+    def read_dir(self, path: str, is_root: bool, mtime: int = 0, old: DirRecord = None):
+        """读取文件夹的内容并生成记录，无法访问时返回None"""
+        scanned = time.time_ns()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            # 与os.walk一样，忽略无法访问的文件夹
+            logger.debug(f"无法访问文件夹: '{path}': {e}")
+            return None
+        # nfo的检查与文件的扫描在同一次scandir中完成
+        has_nfo = any(entry.name.lower().endswith('.nfo') for entry in entries)
+        if has_nfo and self.skip_nfo_dir and not is_root and self.records is None:
+            # 此文件夹将被跳过，不必再获取其中文件的信息（使用索引时则仍然完整记录此文件夹）
+            return DirRecord(path, mtime, has_nfo, [], [], scanned)
+        old_files = {i.name: i for i in old.files} if old else {}
+        files, subdirs = [], []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # 与os.walk的默认行为一致：不进入指向文件夹的符号链接
+                try:
+                    is_symlink = entry.is_symlink()
+                except OSError:
+                    is_symlink = False
+                if not is_symlink:
+                    subdirs.append(entry.name)
+            elif os.path.splitext(entry.name)[1].lower() in self.extensions:
+                try:
+                    # Windows下scandir已经带有文件大小等信息，其他平台则在这里（工作线程中）调用stat
+                    stat = entry.stat()
+                except OSError as e:
+                    logger.debug(f"无法获取文件信息: '{entry.path}': {e}")
+                    continue
+                record = FileRecord(entry.name, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+                prev = old_files.get(entry.name)
+                if prev and prev[:4] == record[:4]:
+                    # 文件没有变化时沿用之前的番号和整理状态
+                    record = prev
+                files.append(record)
+        return DirRecord(path, mtime, has_nfo, subdirs, files, scanned)
+
+    def is_unchanged(self, record: DirRecord, mtime: int) -> bool:
+        """检查文件夹自上次记录以来是否没有变化"""
+        if not ScanIndex.is_fresh(record, mtime):
+            return False
+        # 文件的内容变化不会改变文件夹的修改时间，因此还要检查可能尚未下载完成的小文件
+        for f in record.files:
+            if f.size < self.recheck_below and os.path.splitext(f.name)[1].lower() in self.recheck_extensions:
+                try:
+                    stat = os.stat(os.path.join(record.path, f.name))
+                except OSError:
+                    return False
+                if (stat.st_size, stat.st_mtime_ns) != (f.size, f.mtime):
+                    return False
+        return True
+
+    def scan_dir(self, path: str, is_root: bool):
+        """扫描单个文件夹，返回(文件夹, 文件列表, 子文件夹的Future列表)。文件夹被跳过时返回None"""
+        if self.records is None:
+            record = self.read_dir(path, is_root)
+        else:
+            # 要在读取文件夹的内容之前获取修改时间，这样读取期间发生的变化在下次扫描时也能被发现
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError as e:
+                logger.debug(f"无法访问文件夹: '{path}': {e}")
+                return None
+            self.visited.append(path)
+            record = self.records.get(path)
+            if record is None or not self.is_unchanged(record, mtime):
+                record = self.read_dir(path, is_root, mtime, record)
+                if record is not None:
+                    self.changed.append(record)
+                    self.changed_by_path[path] = record
+        if record is None:
+            return None
+        # 移除有nfo的文件夹（根文件夹除外）
+        if self.skip_nfo_dir and not is_root and record.has_nfo:
+            print(f"skip file {os.path.basename(path)}")
+            return None
+        # 索引中的记录可能是以不同的扩展名列表生成的
+        files = [ScannedFile(f.name, os.path.join(path, f.name), *f[1:]) for f in record.files
+                 if os.path.splitext(f.name)[1].lower() in self.extensions]
+        subdirs = [os.path.join(path, i) for i in record.subdirs if not self.ignore_pattern.match(i)]
+        children = [self.executor.submit(self.scan_dir, i, False) for i in subdirs]
+        return path, files, children
+
+    def walk(self, root: str):
+        try:
+            stack = [self.executor.submit(self.scan_dir, root, True)]
+            while stack:
+                result = stack.pop().result()
+                if result is None:
+                    continue
+                path, files, children = result
+                yield path, files
+                # 逆序入栈，使得出栈的顺序（先序遍历）与os.walk(topdown=True)一致
+                stack.extend(reversed(children))
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def walk_tree(root: str, extensions) -> Iterator[Tuple[str, List[ScannedFile]]]:
+    """遍历文件夹，按照与os.walk相同的顺序逐个返回各文件夹内指定扩展名的文件
+
+    忽略的文件夹以及skip_nfo_dir的规则与scan_movies原有的规则一致
+
+    Args:
+        root (str): 要遍历的文件夹
+        extensions (list of str): 要返回的文件的扩展名（小写，带有'.'）
+
+    Yields:
+        (dirpath, [ScannedFile])
+    """
+    walker = _TreeWalker(extensions, Cfg().scanner.scan_workers)
+    yield from walker.walk(root)
 
 
 def get_failed_when_scan():
@@ -228,24 +535,58 @@ def get_fmt_size(file_or_size) -> str:
         size /= 1024.0
 
 
-_sub_files = {}
 SUB_EXTENSIONS = ('.srt', '.ass')
+class SubtitleIndex:
+    """扫描影片时顺便建立的字幕索引，查找字幕时不必再遍历文件夹"""
+    def __init__(self) -> None:
+        self.subs: Dict[str, List[str]] = {}    # 番号: [字幕文件...]
+        self.roots = set()
+        # 边扫描边整理时，扫描与查找字幕可能在不同的线程中同时进行
+        self.lock = threading.RLock()
+
+    def add_root(self, root: str):
+        """记录已经完整扫描过（包括所有子文件夹）的文件夹"""
+        with self.lock:
+            self.roots.add(os.path.join(os.path.abspath(root), ''))
+
+    def add(self, avid: str, path: str):
+        path = os.path.abspath(path)
+        with self.lock:
+            paths = self.subs.setdefault(avid.upper(), [])
+            if path not in paths:
+                paths.append(path)
+
+    def covers(self, folder: str) -> bool:
+        """folder是否位于已完整扫描过的文件夹中（边扫描边整理时，正在扫描的文件夹不算）"""
+        folder = os.path.join(os.path.abspath(folder), '')
+        with self.lock:
+            return any(folder.startswith(i) for i in self.roots)
+
+    def find(self, folder: str, dvdid: str) -> str | None:
+        """在folder内寻找匹配dvdid的字幕"""
+        prefix = os.path.join(os.path.abspath(folder), '')
+        # 有多个匹配时使用最后扫描到的那个
+        with self.lock:
+            paths = list(self.subs.get(dvdid.upper(), []))
+        for path in reversed(paths):
+            if path.startswith(prefix):
+                return path
+        return None
+
+
+subtitle_index = SubtitleIndex()
 def find_subtitle_in_dir(folder: str, dvdid: str):
     """在folder内寻找是否有匹配dvdid的字幕"""
-    folder_data = _sub_files.get(folder)
-    if folder_data is None:
-        # 此文件夹从未检查过时
-        folder_data = {}
-        for dirpath, dirnames, filenames in os.walk(folder):
-            for file in filenames:
-                basename, ext = os.path.splitext(file)
-                if ext in SUB_EXTENSIONS:
-                    match_id = get_id(basename)
+    with subtitle_index.lock:
+        if not subtitle_index.covers(folder):
+            # 此文件夹从未完整扫描过时（正常情况下字幕索引已在扫描影片时建立）
+            for _, files in walk_tree(folder, SUB_EXTENSIONS):
+                for file in files:
+                    match_id = get_id(os.path.splitext(file.name)[0])
                     if match_id:
-                        folder_data[match_id.upper()] = os.path.join(dirpath, file)
-        _sub_files[folder] = folder_data
-    sub_file = folder_data.get(dvdid.upper())
-    return sub_file
+                        subtitle_index.add(match_id, file.path)
+            subtitle_index.add_root(folder)
+        return subtitle_index.find(folder, dvdid)
 
 
 if __name__ == "__main__":
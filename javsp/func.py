@@ -12,7 +12,6 @@ import subprocess
 import platform
 from datetime import datetime
 from packaging import version
-from colorama import Style
 from pathlib import Path
 import importlib.metadata as meta
 
@@ -29,7 +28,7 @@ from javsp.lib import re_escape, resource_path
 from javsp.prompt import prompt
 
 __all__ = ['select_folder', 'get_scan_dir', 'remove_trail_actor_in_title',
-           'shutdown', 'CLEAR_LINE', 'check_update', 'split_by_punc']
+           'shutdown', 'CLEAR_LINE', 'check_update', 'fetch_update_info', 'split_by_punc']
 
 
 CLEAR_LINE = '\r\x1b[K'
@@ -151,8 +150,36 @@ def split_by_punc(s):
     return ls
 
 
-def check_update(allow_check=True, auto_update=True):
-    """检查版本更新"""
+def fetch_update_info(allow_check=True):
+    """从GitHub获取最新版本的信息（不输出任何内容，因此可以在后台线程中运行）
+
+    Returns:
+        tuple: (update_status, release_data)
+    """
+    local_version = meta.version('javsp')
+    if not allow_check or local_version == "":
+        return 'disallow', None
+    api_url = 'https://api.github.com/repos/Yuukiy/JavSP/releases/latest'
+    try:
+        data = request_get(api_url, timeout=3).json()
+        latest_version = data['tag_name']
+        utc2local(data['published_at'])
+        if version.parse(local_version) < version.parse(latest_version):
+            return 'new_version', data
+        else:
+            return 'already_latest', data
+    except Exception as e:
+        logger.debug('检查版本更新时出错: ' + repr(e))
+        return 'fail_to_check', None
+
+
+def check_update(allow_check=True, auto_update=True, update_info=None):
+    """检查版本更新
+
+    Args:
+        update_info (tuple, optional): 已经通过fetch_update_info获取到的版本信息，为None时在此处获取
+    """
+    from colorama import Style
 
     def print_header(title, info=[]):
         title_width = max([get_actual_width(i) for i in title])
@@ -177,24 +204,16 @@ def check_update(allow_check=True, auto_update=True):
     if local_version == "":
         return
     # 检查更新
-    if allow_check:
-        api_url = 'https://api.github.com/repos/Yuukiy/JavSP/releases/latest'
-        release_url = 'https://github.com/Yuukiy/JavSP/releases/latest'
-        print('正在检查更新...', end='')
-        try:
-            data = request_get(api_url, timeout=3).json()
-            latest_version = data['tag_name']
-            release_time = utc2local(data['published_at'])
-            release_date = release_time.isoformat().split('T')[0]
-            if version.parse(local_version) < version.parse(latest_version):
-                update_status = 'new_version'
-            else:
-                update_status = 'already_latest'
-        except Exception as e:
-            logger.debug('检查版本更新时出错: ' + repr(e))
-            update_status = 'fail_to_check'
-    else:
-        update_status = 'disallow'
+    release_url = 'https://github.com/Yuukiy/JavSP/releases/latest'
+    if update_info is None:
+        if allow_check:
+            print('正在检查更新...', end='')
+        update_info = fetch_update_info(allow_check)
+    update_status, data = update_info
+    if update_status == 'new_version':
+        latest_version = data['tag_name']
+        release_time = utc2local(data['published_at'])
+        release_date = release_time.isoformat().split('T')[0]
     # 根据检查更新的情况输出软件版本信息和更新信息
     print(CLEAR_LINE, end='')
     if update_status == 'disallow':
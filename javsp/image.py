@@ -1,8 +1,13 @@
 """处理本地图片的相关功能"""
+from __future__ import annotations
 from enum import Enum
 import os
 import logging
-from PIL import Image, ImageOps
+from typing import TYPE_CHECKING
+
+# PIL的导入比较耗时，因此推迟到实际处理图片时才导入
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 __all__ = ['valid_pic', 'get_pic_size', 'add_label_to_poster', 'LabelPostion']
@@ -12,6 +17,7 @@ logger = logging.getLogger(__name__)
 
 def valid_pic(pic_path):
     """检查图片文件是否完整"""
+    from PIL import Image, ImageOps
     try:
         img = ImageOps.exif_transpose(Image.open(pic_path))
         img.load()
@@ -48,5 +54,6 @@ def add_label_to_poster(poster: Image.Image, mark_pic_file: Image.Image, pos: La
 
 def get_pic_size(pic_path):
     """获取图片文件的分辨率"""
+    from PIL import Image, ImageOps
     pic = ImageOps.exif_transpose(Image.open(pic_path))
     return pic.size
@@ -0,0 +1,99 @@
+"""缓存各个抓取器解析得到的影片数据（以及未找到影片的记录），再次整理同一影片时不必重新访问网络和解析网页"""
+import time
+import logging
+
+
+from javsp.config import Cfg
+from javsp.datatype import MovieInfo
+from javsp.storage import KVStore
+
+
+__all__ = ['InfoCache', 'info_cache', 'MissCache', 'miss_cache']
+
+
+logger = logging.getLogger(__name__)
+
+
+class InfoCache:
+    """按(抓取器, 番号)缓存抓取器返回的MovieInfo"""
+    def __init__(self, namespace='movie_info') -> None:
+        self.store = KVStore(namespace)
+
+    @staticmethod
+    def enabled() -> bool:
+        return Cfg().crawler.info_cache.enabled
+
+    @staticmethod
+    def make_key(crawler: str, info: MovieInfo) -> str:
+        """生成缓存的键名。抓取器会用站点上的番号覆盖info中的番号，因此必须在抓取之前生成键名"""
+        # 同一个番号在不同数据源模式下会使用不同的抓取器，因此键名中也要区分dvdid和cid
+        if info.dvdid:
+            return f'{crawler}:{info.dvdid.upper()}'
+        return f'{crawler}:cid={info.cid}'
+
+    def load(self, key: str, info: MovieInfo) -> bool:
+        """尝试从缓存中读取数据并更新info
+
+        Returns:
+            bool: 是否命中了缓存
+        """
+        if not self.enabled():
+            return False
+        d = self.store.get(key)
+        if d is None:
+            return False
+        info.update(d)
+        return True
+
+    def save(self, key: str, info: MovieInfo):
+        """缓存抓取器成功获取到的数据"""
+        if not self.enabled():
+            return
+        ttl = Cfg().crawler.info_cache.ttl.total_seconds()
+        if ttl <= 0:
+            return
+        d = info.to_dict()
+        self.store.set(key, d, ttl=ttl)
+
+
+info_cache = InfoCache()
+
+
+class MissCache:
+    """记录抓取器未找到影片的情况，在一段时间内不再向该站点查询此影片。连续多次未找到时，等待的时间将逐渐延长"""
+    def __init__(self, namespace='movie_miss') -> None:
+        self.store = KVStore(namespace)
+
+    @staticmethod
+    def enabled() -> bool:
+        return Cfg().crawler.miss_cache.enabled
+
+    def is_missing(self, key: str) -> bool:
+        """检查抓取器最近是否未找到过此影片（key由InfoCache.make_key生成）"""
+        if not self.enabled():
+            return False
+        d = self.store.get(key)
+        return d is not None and d['until'] > time.time()
+
+    def record(self, key: str):
+        """记录一次未找到影片"""
+        if not self.enabled():
+            return
+        cfg = Cfg().crawler.miss_cache
+        # 记录本身比跳过的时间保留得更久，这样才能知道此前已经连续未找到过多少次
+        d = self.store.get(key, {'count': 0})
+        count = d['count'] + 1
+        backoff = min(cfg.ttl.total_seconds() * 2 ** (count - 1), cfg.max_ttl.total_seconds())
+        if backoff <= 0:
+            return
+        d = {'count': count, 'until': time.time() + backoff}
+        self.store.set(key, d, ttl=backoff + cfg.max_ttl.total_seconds())
+
+    def forget(self, key: str):
+        """抓取成功后清除之前的记录"""
+        if not self.enabled():
+            return
+        self.store.delete(key)
+
+
+miss_cache = MissCache()
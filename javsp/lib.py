@@ -18,7 +18,8 @@ def re_escape(s: str) -> str:
 def resource_path(path: str) -> str:
     """获取一个随代码打包的文件在解压后的路径"""
     if getattr(sys, "frozen", False):
-        return path
+        # 打包后的数据文件位于可执行文件所在的文件夹，使用绝对路径以免受到工作目录变化的影响
+        return str(Path(sys.executable).parent / path)
     else:
         path_joined = Path(__file__).parent.parent / path
         return str(path_joined)
@@ -0,0 +1,112 @@
+"""以流水线的方式并发执行多部影片的各个整理步骤"""
+import queue
+import logging
+import threading
+from typing import Callable, Iterable, List, NamedTuple
+
+
+__all__ = ['Stage', 'Pipeline']
+
+
+logger = logging.getLogger(__name__)
+# 通知下游阶段的工作线程退出的标记
+_STOP = object()
+
+
+class Stage(NamedTuple):
+    """流水线中的一个阶段"""
+    name: str
+    func: Callable
+    workers: int = 1
+
+
+class Pipeline:
+    """由多个阶段组成的流水线，阶段之间通过有界队列连接
+
+    每个阶段拥有各自的工作线程，某个条目在当前阶段处理完成后立即进入下一个阶段的队列，
+    因此不同条目的不同阶段可以重叠执行。某一阶段抛出异常时，对应条目被丢弃，不影响其他条目；
+    启用fail_fast时则不再处理排在它之后的条目（之前的条目仍会处理完），并在所有工作线程退出后重新抛出这个异常
+    """
+    def __init__(self, stages: List[Stage], queue_size: int = 0, on_done: Callable = None, fail_fast: bool = False) -> None:
+        """
+        Args:
+            stages (List[Stage]): 按执行顺序排列的各个阶段
+            queue_size (int): 阶段之间的队列长度，0表示不限制
+            on_done (Callable, optional): 每个条目结束处理（成功或失败）后的回调函数: on_done(item, success)
+            fail_fast (bool): 是否在第一个条目失败时中止整个流水线
+        """
+        if not stages:
+            raise ValueError('Pipeline requires at least one stage')
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_done = on_done
+        self.fail_fast = fail_fast
+
+    def run(self, items: Iterable) -> list:
+        """让所有条目依次通过各个阶段，返回成功通过全部阶段的条目（保持输入时的顺序）"""
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        alive = [i.workers for i in self.stages]
+        finished = {}
+        # fail_fast模式下失败的条目: {序号: 异常}
+        errors = {}
+        lock = threading.Lock()
+
+        def notify(item, success):
+            if self.on_done:
+                self.on_done(item, success)
+
+        def work(i: int, stage: Stage):
+            q_in = queues[i]
+            is_last = (i == len(self.stages) - 1)
+            while True:
+                task = q_in.get()
+                if task is _STOP:
+                    break
+                index, item = task
+                # 排在失败条目之后的条目不再处理（逐部处理时根本不会轮到它们）
+                with lock:
+                    skip = bool(errors) and index > min(errors)
+                if skip:
+                    continue
+                try:
+                    stage.func(item)
+                except Exception as e:
+                    notify(item, False)
+                    if self.fail_fast:
+                        with lock:
+                            errors[index] = e
+                    else:
+                        logger.error(f'{stage.name}: 整理失败: {item}: {e}')
+                        logger.debug(e, exc_info=True)
+                    continue
+                if is_last:
+                    with lock:
+                        finished[index] = item
+                    notify(item, True)
+                else:
+                    queues[i+1].put(task)
+            # 当前阶段的最后一个工作线程退出时，通知下一个阶段的所有工作线程退出
+            with lock:
+                alive[i] -= 1
+                all_exited = (alive[i] == 0)
+            if all_exited and not is_last:
+                for _ in range(self.stages[i+1].workers):
+                    queues[i+1].put(_STOP)
+
+        threads = []
+        for i, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                th = threading.Thread(target=work, name=f'{stage.name}-{n}', args=(i, stage), daemon=True)
+                th.start()
+                threads.append(th)
+        for task in enumerate(items):
+            if errors:
+                break
+            queues[0].put(task)
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_STOP)
+        for th in threads:
+            th.join()
+        if errors:
+            raise errors[min(errors)]
+        return [finished[i] for i in sorted(finished)]
@@ -0,0 +1,134 @@
+"""根据番号前缀(label)选择可能收录该影片的抓取器，跳过只收录特定厂商影片、不可能有此影片的站点"""
+import os
+import re
+import json
+import random
+import logging
+import threading
+from typing import Dict, List, Set
+
+
+from javsp.config import Cfg
+from javsp.datatype import MovieInfo
+from javsp.lib import resource_path
+from javsp.storage import KVStore
+
+
+__all__ = ['get_label', 'LabelRouter', 'label_router']
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_label(dvdid: str) -> str:
+    """提取番号的前缀，并去掉素人番号开头的数字（如'259LUXU-1234'的'LUXU'）"""
+    if not dvdid or '-' not in dvdid:
+        return ''
+    return re.sub(r'^\d+', '', dvdid.split('-')[0]).upper()
+
+
+class LabelRouter:
+    """维护'抓取器→收录的番号前缀'的路由表。路由表由内置的种子文件和从抓取结果中学习到的前缀组成
+
+    路由表难以收录全部前缀，因此只有站点确实多次未找到某一前缀的影片之后，才会跳过这个站点
+    """
+    def __init__(self, seed_file='data/label_routes.json', namespace='label_routes') -> None:
+        # 整理开始后工作目录会改变，因此在创建实例时（启动时）就确定种子文件的绝对路径
+        self.seed_file = os.path.abspath(resource_path(seed_file))
+        self.store = KVStore(namespace)
+        # 各站点未找到影片的番号前缀及次数: {crawler: {label: count}}
+        self.miss_store = KVStore(namespace + '_misses')
+        self.routes: Dict[str, Set[str]] = None
+        self.makers: Dict[str, List[str]] = {}
+        self.lock = threading.Lock()
+
+    def _load(self):
+        with self.lock:
+            if self.routes is not None:
+                return
+            with open(self.seed_file, encoding='utf-8') as f:
+                seed = json.load(f)
+            routes = {}
+            for crawler, d in seed.items():
+                if crawler.startswith('_'):
+                    continue
+                routes[crawler] = set(d.get('labels', []))
+                self.makers[crawler] = [i.upper() for i in d.get('makers', [])]
+            for crawler, labels in self.store.items():
+                routes.setdefault(crawler, set()).update(labels)
+            self.routes = routes
+
+    @staticmethod
+    def enabled() -> bool:
+        return Cfg().crawler.label_routing.enabled
+
+    def can_have(self, crawler: str, label: str) -> bool:
+        """判断抓取器是否可能收录此前缀的影片"""
+        self._load()
+        labels = self.routes.get(crawler)
+        if labels is None or label in labels:
+            return True
+        # 路由表中没有此前缀时，站点仍然可能收录了它，直到多次未找到此前缀的影片
+        misses = self.miss_store.get(crawler, {})
+        return misses.get(label, 0) < Cfg().crawler.label_routing.min_misses
+
+    def filter(self, crawlers: List[str], movie_id: str) -> List[str]:
+        """去掉不可能收录此影片的抓取器"""
+        if not self.enabled():
+            return crawlers
+        label = get_label(movie_id)
+        if not label:
+            return crawlers
+        selected = []
+        for name in crawlers:
+            if self.can_have(name, label):
+                selected.append(name)
+            # 偶尔仍然访问路由表中没有此前缀的站点，以便学习到站点新收录的前缀
+            elif random.random() < Cfg().crawler.label_routing.explore:
+                logger.debug(f"{name}: 尝试访问路由表中未收录'{label}'的站点")
+                selected.append(name)
+            else:
+                logger.debug(f"{name}: 此站点不收录'{label}'系列的影片，跳过")
+        return selected
+
+    def _add(self, crawler: str, label: str):
+        with self.lock:
+            labels = self.routes[crawler]
+            if label in labels:
+                return
+            labels.add(label)
+            learned = set(self.store.get(crawler, []))
+            learned.add(label)
+            self.store.set(crawler, sorted(learned))
+        logger.debug(f"{crawler}: 路由表新增番号前缀'{label}'")
+
+    def record_miss(self, crawler: str, dvdid: str):
+        """记录站点未找到此番号的影片"""
+        if not self.enabled():
+            return
+        self._load()
+        label = get_label(dvdid)
+        if not label or crawler not in self.routes or label in self.routes[crawler]:
+            return
+        with self.lock:
+            misses = self.miss_store.get(crawler, {})
+            misses[label] = misses.get(label, 0) + 1
+            self.miss_store.set(crawler, misses)
+
+    def learn(self, crawler: str, info: MovieInfo):
+        """根据抓取成功的结果更新路由表：站点自身找到了影片，或者影片的厂商属于某个只收录特定厂商的站点"""
+        if not self.enabled():
+            return
+        self._load()
+        label = get_label(info.dvdid)
+        if not label:
+            return
+        if crawler in self.routes:
+            self._add(crawler, label)
+        makers = {str(i).upper() for i in (info.producer, info.publisher) if i}
+        for name, names in self.makers.items():
+            if any(m in names for m in makers):
+                self._add(name, label)
+
+
+label_router = LabelRouter()
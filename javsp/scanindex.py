@@ -0,0 +1,172 @@
+"""影片扫描的本地索引：记录各文件夹及其中影片文件的状态，再次扫描时跳过没有变化的文件夹"""
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Iterable, List, NamedTuple
+
+
+from javsp.config import Cfg
+from javsp.storage import SQLiteDB
+
+
+__all__ = ['FileRecord', 'DirRecord', 'ScanIndex', 'scan_index']
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL,
+    has_nfo INTEGER NOT NULL,
+    subdirs TEXT NOT NULL,
+    scanned INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    avid TEXT,
+    av_type TEXT,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+'''
+# 索引格式或扫描规则变化时递增此值，使旧的索引失效
+INDEX_VERSION = 1
+# 文件夹的修改时间与扫描时间过于接近时，无法确定扫描之后文件夹是否又发生了变化（时间戳的精度有限），
+# 此时不信任记录，下次扫描时重新读取这个文件夹（单位: 纳秒）
+RACY_WINDOW = 2 * 10**9
+
+
+class FileRecord(NamedTuple):
+    """索引中的一个文件"""
+    name: str
+    size: int
+    mtime: int
+    inode: int
+    avid: str = None        # 识别出的番号（cid优先），为None表示未识别过
+    av_type: str = None
+    status: str = 'new'
+
+
+class DirRecord(NamedTuple):
+    """索引中的一个文件夹"""
+    path: str
+    mtime: int
+    has_nfo: bool
+    subdirs: List[str]
+    files: List[FileRecord]
+    scanned: int
+
+
+class ScanIndex:
+    """记录扫描过的文件夹和影片文件
+
+    文件夹内新增、删除或重命名条目时其修改时间会改变，修改时间未变的文件夹可以直接使用记录中的文件列表，
+    不必再列出其内容并获取每个文件的信息
+    """
+    NEW = 'new'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path='scan_index.db') -> None:
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self) -> SQLiteDB:
+        if self._db is None:
+            self._db = SQLiteDB(self.path, SCHEMA)
+        return self._db
+
+    @staticmethod
+    def enabled() -> bool:
+        return Cfg().scanner.index.enabled
+
+    @staticmethod
+    def fingerprint(extensions: Iterable[str]) -> str:
+        """影响扫描结果的配置项。配置变化后，已有的索引不再可信"""
+        scanner = Cfg().scanner
+        data = [INDEX_VERSION, sorted(extensions), scanner.ignored_id_pattern, scanner.skip_nfo_dir]
+        return hashlib.sha1(json.dumps(data).encode('utf-8')).hexdigest()
+
+    def load(self, fingerprint: str) -> Dict[str, DirRecord]:
+        """读取全部记录。fingerprint与记录中的不同时，清空索引并返回空字典"""
+        rows = self.db.execute("SELECT value FROM meta WHERE key='fingerprint'")
+        if not rows or rows[0][0] != fingerprint:
+            if rows:
+                logger.debug('扫描规则已变化，重建扫描索引')
+            self.clear()
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+            return {}
+        files = {}
+        for dir, name, size, mtime, inode, avid, av_type, status in self.db.execute(
+                'SELECT dir, name, size, mtime, inode, avid, av_type, status FROM files'):
+            files.setdefault(dir, []).append(FileRecord(name, size, mtime, inode, avid, av_type, status))
+        records = {}
+        for path, mtime, has_nfo, subdirs, scanned in self.db.execute('SELECT * FROM dirs'):
+            records[path] = DirRecord(path, mtime, bool(has_nfo), json.loads(subdirs), files.get(path, []), scanned)
+        return records
+
+    @staticmethod
+    def is_fresh(record: DirRecord, mtime: int) -> bool:
+        """文件夹在记录之后是否没有变化"""
+        return record.mtime == mtime and record.mtime < record.scanned - RACY_WINDOW
+
+    def save(self, root: str, changed: List[DirRecord], visited: Iterable[str], old: Dict[str, DirRecord], avids: Dict[str, tuple] = {}):
+        """保存一次扫描的结果
+
+        Args:
+            root (str): 扫描的根文件夹（绝对路径）
+            changed (List[DirRecord]): 本次重新读取过的文件夹
+            visited (Iterable[str]): 本次扫描到的所有文件夹
+            old (Dict[str, DirRecord]): 扫描前的记录，其中位于root下但本次未扫描到的文件夹将被删除
+            avids (Dict[str, tuple], optional): 本次识别到的各文件的(番号, 分类)
+        """
+        self.save_dirs(changed, avids)
+        self.remove_missing(root, visited, old)
+
+    def save_dirs(self, changed: List[DirRecord], avids: Dict[str, tuple] = {}):
+        """写入（替换）重新读取过的文件夹的记录"""
+        removed = [(i.path,) for i in changed]
+        self.db.executemany('DELETE FROM dirs WHERE path=?', removed)
+        self.db.executemany('DELETE FROM files WHERE dir=?', removed)
+        self.db.executemany('INSERT INTO dirs VALUES (?, ?, ?, ?, ?)',
+                            [(i.path, i.mtime, int(i.has_nfo), json.dumps(i.subdirs, ensure_ascii=False), i.scanned) for i in changed])
+        rows = []
+        for i in changed:
+            for f in i.files:
+                path = os.path.join(i.path, f.name)
+                avid, av_type = avids.get(path, (f.avid, f.av_type))
+                rows.append((path, i.path, f.name, f.size, f.mtime, f.inode, avid, av_type, f.status))
+        self.db.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def remove_missing(self, root: str, visited: Iterable[str], old: Dict[str, DirRecord]):
+        """删除位于root下但本次扫描未找到的文件夹的记录（只能在完整扫描了root之后调用）"""
+        visited = set(visited)
+        prefix = os.path.join(root, '')
+        removed = [(p,) for p in old if (p == root or p.startswith(prefix)) and p not in visited]
+        self.db.executemany('DELETE FROM dirs WHERE path=?', removed)
+        self.db.executemany('DELETE FROM files WHERE dir=?', removed)
+
+    def set_status(self, files: Iterable[str], status: str):
+        """更新影片文件的整理状态"""
+        self.db.executemany('UPDATE files SET status=? WHERE path=?', [(status, os.path.abspath(i)) for i in files])
+
+    def clear(self):
+        self.db.execute('DELETE FROM dirs')
+        self.db.execute('DELETE FROM files')
+        self.db.execute('DELETE FROM meta')
+
+
+scan_index = ScanIndex()
@@ -0,0 +1,125 @@
+"""本地持久化数据（缓存、索引等）的存取"""
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+
+from javsp.config import Cfg
+
+
+__all__ = ['get_data_dir', 'SQLiteDB', 'KVStore']
+
+
+def get_data_dir() -> Path:
+    """获取存放缓存、索引等本地数据的文件夹（不存在时自动创建）"""
+    data_dir = Cfg().other.data_dir
+    if data_dir is None:
+        data_dir = Path.home() / '.javsp'
+    data_dir = data_dir.expanduser().absolute()
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir
+
+
+class SQLiteDB:
+    """可以在多个线程间共享的SQLite数据库连接"""
+    def __init__(self, path: str | Path, schema: str = '') -> None:
+        """
+        Args:
+            path (str | Path): 数据库文件的路径。只给出文件名时，将保存到get_data_dir()所在的文件夹
+            schema (str, optional): 初始化数据库使用的SQL脚本（应当使用'IF NOT EXISTS'）
+        """
+        path = Path(path)
+        if path.parent == Path('.'):
+            path = get_data_dir() / path
+        self.path = path
+        self.lock = threading.Lock()
+        # 连接由lock保护，因此允许在创建它的线程之外使用
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        if schema:
+            self.conn.executescript(schema)
+
+    def execute(self, sql: str, params=()) -> list:
+        """执行一条SQL语句并返回所有结果行"""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql: str, seq_of_params) -> None:
+        """使用多组参数执行同一条SQL语句（在同一个事务中完成）"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                self.conn.executemany(sql, seq_of_params)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+KV_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS kv (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL,
+    PRIMARY KEY (namespace, key)
+);
+'''
+_kv_db = None
+_kv_db_lock = threading.Lock()
+def _get_kv_db() -> SQLiteDB:
+    """各个KVStore共用同一个数据库文件（首次使用时才创建）"""
+    global _kv_db
+    with _kv_db_lock:
+        if _kv_db is None:
+            _kv_db = SQLiteDB('javsp.db', KV_SCHEMA)
+        return _kv_db
+
+
+class KVStore:
+    """简单的键值存储，值以JSON格式保存，可以为每个条目设置有效期"""
+    def __init__(self, namespace: str, db: SQLiteDB = None) -> None:
+        """
+        Args:
+            namespace (str): 命名空间，不同用途的数据使用不同的命名空间以免键名冲突
+            db (SQLiteDB, optional): 使用的数据库，默认使用数据文件夹下的javsp.db
+        """
+        self.namespace = namespace
+        self._db = db
+
+    @property
+    def db(self) -> SQLiteDB:
+        if self._db is None:
+            self._db = _get_kv_db()
+        return self._db
+
+    def get(self, key: str, default=None):
+        """读取指定键的值，不存在或已过期时返回default"""
+        rows = self.db.execute('SELECT value, expires FROM kv WHERE namespace=? AND key=?', (self.namespace, key))
+        if not rows:
+            return default
+        value, expires = rows[0]
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return default
+        return json.loads(value)
+
+    def set(self, key: str, value, ttl: float = None):
+        """写入指定键的值。ttl为有效期（秒），为None时永不过期"""
+        expires = None if ttl is None else time.time() + ttl
+        text = json.dumps(value, ensure_ascii=False)
+        self.db.execute('INSERT OR REPLACE INTO kv VALUES (?, ?, ?, ?)', (self.namespace, key, text, expires))
+
+    def delete(self, key: str):
+        self.db.execute('DELETE FROM kv WHERE namespace=? AND key=?', (self.namespace, key))
+
+    def items(self) -> list:
+        """获取所有未过期的条目(key, value)"""
+        rows = self.db.execute('SELECT key, value FROM kv WHERE namespace=? AND (expires IS NULL OR expires>=?)',
+                               (self.namespace, time.time()))
+        return [(k, json.loads(v)) for k, v in rows]
+
+    def clear(self):
+        self.db.execute('DELETE FROM kv WHERE namespace=?', (self.namespace,))
@@ -0,0 +1,220 @@
+"""监视模式：持续监视待整理的文件夹，新的影片文件下载完成后立即整理"""
+import os
+import re
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import logging
+from typing import Callable, Dict, List, Set
+
+
+from javsp.config import Cfg
+from javsp.file import scan_movies, walk_tree
+from javsp.datatype import Movie
+
+
+__all__ = ['InotifyWatcher', 'PollingWatcher', 'create_watcher', 'watch_movies']
+
+
+logger = logging.getLogger(__name__)
+
+
+# inotify相关的常量，见 /usr/include/linux/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """基于Linux inotify的文件夹监视器（通过ctypes调用，不需要额外的依赖）"""
+    def __init__(self, root: str, extensions) -> None:
+        self.root = root
+        self.extensions = frozenset(extensions)
+        self.ignore_pattern = re.compile('|'.join(Cfg().scanner.ignored_folder_name_pattern))
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.watches: Dict[int, str] = {}
+        self.add_tree(root)
+
+    def add_watch(self, path: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            # 文件夹在添加监视之前就被删除了，直接忽略
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, f"{os.strerror(err)}: '{path}'")
+        self.watches[wd] = path
+
+    def add_tree(self, path: str) -> List[str]:
+        """监视path及其下的所有子文件夹，返回其中已有的影片文件（文件可能在添加监视前就已经创建了）"""
+        self.add_watch(path)
+        files = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [i for i in dirnames if not self.ignore_pattern.match(i)]
+            for name in dirnames:
+                self.add_watch(os.path.join(dirpath, name))
+            files.extend(os.path.join(dirpath, i) for i in filenames if self.is_video(i))
+        return files
+
+    def is_video(self, name: str) -> bool:
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def poll(self, timeout: float) -> Set[str]:
+        """等待文件系统事件，返回可能有变化的影片文件"""
+        changed = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset+length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，有事件丢失了，只能重新检查整个文件夹
+                logger.warning('文件系统事件过多，部分事件已丢失，将重新扫描整个文件夹')
+                changed.update(self.add_tree(self.root))
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            parent = self.watches.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, name)
+            if mask & IN_ISDIR:
+                # 新建（或移入）的文件夹：监视它，并检查其中已有的文件
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.ignore_pattern.match(name):
+                    changed.update(self.add_tree(path))
+            elif self.is_video(name):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """定时扫描文件夹的监视器，用于不支持inotify的平台（以及inotify不可用的情况，比如网络文件夹）"""
+    def __init__(self, root: str, extensions, interval: float) -> None:
+        self.root = root
+        self.extensions = extensions
+        self.interval = interval
+        self.last_poll = time.monotonic()
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for _, files in walk_tree(self.root, self.extensions):
+            for f in files:
+                snapshot[f.path] = (f.size, f.mtime)
+        return snapshot
+
+    def poll(self, timeout: float) -> Set[str]:
+        """距离上次扫描已经超过interval时重新扫描，返回新增或有变化的影片文件"""
+        remaining = self.last_poll + self.interval - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(remaining, 0))
+        self.last_poll = time.monotonic()
+        snapshot = self.take_snapshot()
+        changed = {k for k, v in snapshot.items() if self.snapshot.get(k) != v}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(root: str, extensions):
+    """创建监视器：Linux下优先使用inotify，不可用时使用定时扫描"""
+    cfg = Cfg().scanner.watch
+    if cfg.use_inotify and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root, extensions)
+        except OSError as e:
+            # 比如监视的文件夹数量超出了fs.inotify.max_user_watches的限制
+            logger.warning(f'无法使用inotify监视文件夹，改为定时扫描: {e}')
+    return PollingWatcher(root, extensions, cfg.poll_interval.total_seconds())
+
+
+def watch_movies(root: str, on_movies: Callable[[List[Movie]], None]):
+    """持续监视root文件夹，新的影片文件大小稳定下来之后，调用on_movies整理这些影片
+
+    同一文件夹下的文件要全部稳定后才一起处理，这样多分片的影片可以被正确地识别为同一部影片
+    """
+    cfg = Cfg().scanner.watch
+    settle = cfg.settle_time.total_seconds()
+    watcher = create_watcher(root, Cfg().scanner.filename_extensions)
+    logger.info(f"监视模式: 正在监视文件夹 '{root}'（按Ctrl+C退出）")
+    # 等待文件大小稳定的影片文件: path: (上次检查时的大小, 大小最近一次变化的时间)
+    pending: Dict[str, tuple] = {}
+    try:
+        while True:
+            now = time.monotonic()
+            for path in watcher.poll(timeout=1.0):
+                pending[os.path.abspath(path)] = (-1, now)
+            if not pending:
+                continue
+            now = time.monotonic()
+            stable, busy_dirs = [], set()
+            for path, (size, since) in list(pending.items()):
+                try:
+                    cur = os.path.getsize(path)
+                except OSError:
+                    # 文件已被删除或移走
+                    del pending[path]
+                    continue
+                if cur != size:
+                    pending[path] = (cur, now)
+                    busy_dirs.add(os.path.dirname(path))
+                elif now - since >= settle:
+                    stable.append(path)
+                else:
+                    busy_dirs.add(os.path.dirname(path))
+            ready = {i for i in stable if os.path.dirname(i) not in busy_dirs}
+            if not ready:
+                continue
+            for path in ready:
+                del pending[path]
+            # 借助扫描索引，重新扫描整个文件夹的开销很小，这样分片、nfo文件夹等规则都与普通模式完全一致
+            try:
+                movies = [m for m in scan_movies(root) if ready.intersection(os.path.abspath(i) for i in m.files)]
+            except Exception as e:
+                logger.error(f'扫描失败: {e}')
+                logger.debug(e, exc_info=True)
+                # 稍后重新处理这些文件
+                for path in ready:
+                    pending[path] = (-1, time.monotonic())
+                continue
+            if not movies:
+                continue
+            logger.info(f'监视模式: 发现{len(movies)}部新的影片')
+            # 逐部整理：on_movies遇到整理失败的影片时会中止，而之后的扫描不会再返回这一批中的其他影片
+            for movie in movies:
+                try:
+                    on_movies([movie])
+                except Exception as e:
+                    logger.error(f'整理失败: {e}')
+                    logger.debug(e, exc_info=True)
+    finally:
+        watcher.close()
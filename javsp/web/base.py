@@ -4,21 +4,29 @@ import sys
 import time
 import shutil
 import logging
+import threading
 import requests
 import contextlib
-import cloudscraper
 import lxml.html
 from tqdm import tqdm
 from lxml import etree
 from lxml.html.clean import Cleaner
 from requests.models import Response
+from requests.adapters import HTTPAdapter
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+from contextvars import ContextVar
 
 
 from javsp.config import Cfg
+from javsp.web.cache import response_cache
+from javsp.web.cookies import scraper_cookies
 from javsp.web.exceptions import *
 
 
-__all__ = ['Request', 'get_html', 'post_html', 'request_get', 'resp2html', 'is_connectable', 'download', 'get_resp_text', 'read_proxy']
+__all__ = ['Request', 'get_html', 'post_html', 'request_get', 'resp2html', 'is_connectable', 'download', 'get_resp_text', 'read_proxy',
+           'site_limiter',
+           'CancelToken', 'set_cancel_token', 'check_cancelled']
 
 
 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'}
@@ -34,6 +42,170 @@ def read_proxy():
         proxy = str(Cfg().network.proxy_server)
         return {'http': proxy, 'https': proxy}
 
+class SessionPool:
+    """为每个站点（域名）维护一个长期复用的Session，使同一站点的请求可以复用已建立的连接（包括代理和TLS握手）"""
+    def __init__(self) -> None:
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def mount(self, session: requests.Session):
+        """按照配置调整session的连接池大小
+
+        只修改session已有的adapter而不是替换它们，因为cloudscraper依赖其自定义的adapter（加密套件等）来通过Cloudflare的检查
+        """
+        cfg = Cfg().network.session
+        adapters = {id(i): i for i in session.adapters.values() if isinstance(i, HTTPAdapter)}
+        for adapter in adapters.values():
+            adapter._pool_connections = cfg.pool_connections
+            adapter._pool_maxsize = cfg.pool_maxsize
+            adapter.init_poolmanager(cfg.pool_connections, cfg.pool_maxsize, block=adapter._pool_block)
+        if not cfg.keep_alive:
+            session.headers['Connection'] = 'close'
+
+    def get_session(self, url: str) -> requests.Session:
+        host = (urlsplit(url).hostname or '').lower()
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # 与直接使用requests.get时一样，不在请求之间保留服务器设置的Cookies，所需的Cookies由调用方显式传入
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                self.mount(session)
+                self.sessions[host] = session
+            return session
+
+    def get(self, url, **kw) -> Response:
+        return self.get_session(url).get(url, **kw)
+
+    def post(self, url, **kw) -> Response:
+        return self.get_session(url).post(url, **kw)
+
+    def head(self, url, **kw) -> Response:
+        # 与requests.head保持一致，默认不跟随重定向
+        kw.setdefault('allow_redirects', False)
+        return self.get_session(url).head(url, **kw)
+
+
+session_pool = SessionPool()
+
+
+class TokenBucket:
+    """令牌桶: 限制平均请求速率的同时允许一定程度的突发请求"""
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取走一个令牌，令牌不足时阻塞到可用为止"""
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # 令牌数允许为负值，表示已被预约的令牌，这样就不必在等待期间持有锁
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class PolitenessScheduler:
+    """为每个站点（域名）单独维护一个令牌桶，使所有网络请求都遵守对应站点的访问频率限制"""
+    def __init__(self) -> None:
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _get_bucket(self, host: str) -> TokenBucket:
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                cfg = Cfg().network.politeness
+                limit = cfg.default
+                # 优先使用最具体的站点配置，如'www.javbus.com'优先于'javbus.com'
+                for site in sorted(cfg.sites, key=len, reverse=True):
+                    if host == site or host.endswith('.' + site):
+                        limit = cfg.sites[site]
+                        break
+                bucket = TokenBucket(limit.rate, limit.burst)
+                self.buckets[host] = bucket
+            return bucket
+
+    def wait(self, url: str):
+        """等待直到可以向url所在的站点发起请求"""
+        host = urlsplit(url).hostname
+        if host:
+            self._get_bucket(host.lower()).acquire()
+
+
+scheduler = PolitenessScheduler()
+
+
+class CancelToken:
+    """用于协作式地取消抓取任务：取消后，该任务发起的下一个网络请求将抛出CrawlerCancelled"""
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+# 每个抓取线程的上下文是独立的，因此各个抓取任务有各自的取消令牌
+_cancel_token: ContextVar[CancelToken] = ContextVar('cancel_token', default=None)
+def set_cancel_token(token: CancelToken):
+    """为当前的抓取任务（线程）设置取消令牌"""
+    _cancel_token.set(token)
+
+
+def check_cancelled():
+    """如果当前的抓取任务已被取消，则抛出CrawlerCancelled"""
+    token = _cancel_token.get()
+    if token is not None and token.cancelled:
+        raise CrawlerCancelled('抓取任务已被取消')
+
+
+def _before_request(url):
+    """所有网络请求发出前的统一处理：检查取消状态并遵守站点的访问频率限制"""
+    check_cancelled()
+    scheduler.wait(url)
+    # 等待期间任务可能已经被取消
+    check_cancelled()
+
+
+class SiteLimiter:
+    """限制同时访问每个站点的抓取任务数量。限制在所有影片、所有线程之间共享"""
+    def __init__(self) -> None:
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def get_limit(self, crawler: str) -> int:
+        """获取指定抓取器的并发数限制（0表示不限制）"""
+        cfg = Cfg().network.concurrency
+        return cfg.sites.get(crawler, cfg.default)
+
+    @contextlib.contextmanager
+    def slot(self, crawler: str):
+        """在with语句块内占用指定站点的一个并发名额"""
+        limit = self.get_limit(crawler)
+        if not limit:
+            yield
+            return
+        with self.lock:
+            sem = self.semaphores.setdefault(crawler, threading.BoundedSemaphore(limit))
+        with sem:
+            yield
+
+
+site_limiter = SiteLimiter()
+
+
 # 与网络请求相关的功能汇总到一个模块中以方便处理，但是不同站点的抓取器又有自己的需求（针对不同网站
 # 需要使用不同的UA、语言等）。每次都传递参数很麻烦，而且会面临函数参数越加越多的问题。因此添加这个
 # 处理网络请求的类，它带有默认的属性，但是也可以在各个抓取器模块里进行进行定制
@@ -48,39 +220,59 @@ class Request():
         self.timeout = Cfg().network.timeout.total_seconds()
         if not use_scraper:
             self.scraper = None
-            self.__get = requests.get
-            self.__post = requests.post
-            self.__head = requests.head
+            self.__get = session_pool.get
+            self.__post = session_pool.post
+            self.__head = session_pool.head
         else:
+            # 只有部分抓取器需要cloudscraper，因此在需要时才导入
+            import cloudscraper
             self.scraper = cloudscraper.create_scraper()
+            self._cookie_sites = set()
+            session_pool.mount(self.scraper)
             self.__get = self._scraper_monitor(self.scraper.get)
             self.__post = self._scraper_monitor(self.scraper.post)
             self.__head = self._scraper_monitor(self.scraper.head)
 
     def _scraper_monitor(self, func):
         """监控cloudscraper的工作状态，遇到不支持的Challenge时尝试退回常规的requests请求"""
-        def wrapper(*args, **kw):
+        def wrapper(url, *args, **kw):
+            user_agent = self.headers.get('User-Agent', '')
+            # 首次请求一个站点前载入之前保存的Cookies，这样就不必在每次运行时都重新通过CloudFlare检测。UA可能在创建实例后
+            # 才被修改，因此推迟到这里才载入
+            site = scraper_cookies.get_site(urlsplit(url).hostname or '')
+            if site not in self._cookie_sites:
+                scraper_cookies.load(self.scraper.cookies, url, user_agent)
+                self._cookie_sites.add(site)
             try:
-                return func(*args, **kw)
+                r = func(url, *args, **kw)
             except Exception as e:
                 logger.debug(f"无法通过CloudFlare检测: '{e}', 尝试退回常规的requests请求")
                 if func == self.scraper.get:
-                    return requests.get(*args, **kw)
+                    return session_pool.get(url, *args, **kw)
                 else:
-                    return requests.post(*args, **kw)
+                    return session_pool.post(url, *args, **kw)
+            scraper_cookies.save(self.scraper.cookies, r.url or url, user_agent)
+            return r
         return wrapper
 
     def get(self, url, delay_raise=False):
+        key = response_cache.make_key('GET', url, self.headers, self.cookies)
+        r = response_cache.get(key, url)
+        if r is not None:
+            return r
+        _before_request(url)
         r = self.__get(url,
                       headers=self.headers,
                       proxies=self.proxies,
                       cookies=self.cookies,
                       timeout=self.timeout)
+        response_cache.put(key, url, r)
         if not delay_raise:
             r.raise_for_status()
         return r
 
     def post(self, url, data, delay_raise=False):
+        _before_request(url)
         r = self.__post(url,
                       data=data,
                       headers=self.headers,
@@ -92,6 +284,7 @@ class Request():
         return r
 
     def head(self, url, delay_raise=True):
+        _before_request(url)
         r = self.__head(url,
                       headers=self.headers,
                       proxies=self.proxies,
@@ -118,8 +311,14 @@ def request_get(url, cookies={}, timeout=None, delay_raise=False):
     """获取指定url的原始请求"""
     if timeout is None:
         timeout = Cfg().network.timeout.seconds
-    
-    r = requests.get(url, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
+
+    key = response_cache.make_key('GET', url, headers, cookies)
+    r = response_cache.get(key, url)
+    if r is not None:
+        return r
+    _before_request(url)
+    r = session_pool.get(url, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
+    response_cache.put(key, url, r)
     if not delay_raise:
         if r.status_code == 403 and b'>Just a moment...<' in r.content:
             raise SiteBlocked(f"403 Forbidden: 无法通过CloudFlare检测: {url}")
@@ -132,7 +331,8 @@ def request_post(url, data, cookies={}, timeout=None, delay_raise=False):
     """向指定url发送post请求"""
     if timeout is None:
         timeout = Cfg().network.timeout.seconds
-    r = requests.post(url, data=data, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
+    _before_request(url)
+    r = session_pool.post(url, data=data, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
     if not delay_raise:
         r.raise_for_status()
     return r
@@ -201,7 +401,7 @@ def dump_xpath_node(node, filename=None):
 def is_connectable(url, timeout=3):
     """测试与指定url的连接"""
     try:
-        r = requests.get(url, headers=headers, timeout=timeout)
+        r = session_pool.get(url, headers=headers, timeout=timeout)
         return True
     except requests.exceptions.RequestException as e:
         logger.debug(f"Not connectable: {url}\n" + repr(e))
@@ -213,8 +413,10 @@ def urlretrieve(url, filename=None, reporthook=None, headers=None):
         headers["Referer"] = "https://www.arzon.jp/"
     """使用requests实现urlretrieve"""
     # https://blog.csdn.net/qq_38282706/article/details/80253447
-    with contextlib.closing(requests.get(url, headers=headers,
-                                         proxies=read_proxy(), stream=True)) as r:
+    _before_request(url)
+    # 使用closing确保下载结束后连接能够归还到连接池中
+    with contextlib.closing(session_pool.get(url, headers=headers,
+                                             proxies=read_proxy(), stream=True)) as r:
         header = r.headers
         with open(filename, 'wb+') as fp:
             bs = 1024
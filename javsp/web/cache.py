@@ -0,0 +1,137 @@
+"""网络请求的响应缓存：将网页保存到本地，重复整理同一批影片时不必再次访问网络"""
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+
+from javsp.config import Cfg
+from javsp.storage import SQLiteDB
+
+
+__all__ = ['ResponseCache', 'response_cache']
+
+
+logger = logging.getLogger(__name__)
+# 会影响响应内容的请求头（请求头的键名统一使用小写）
+RELEVANT_HEADERS = ('accept-language', 'cookie')
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS response (
+    key TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    url TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_response_accessed ON response (accessed);
+'''
+
+
+class ResponseCache:
+    """基于SQLite的响应缓存，仅缓存没有发生重定向的200响应，响应体经过压缩后保存"""
+    def __init__(self, path='http_cache.db') -> None:
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    @property
+    def db(self) -> SQLiteDB:
+        # 首次使用时才创建数据库，未启用缓存时不会产生任何文件
+        with self._lock:
+            if self._db is None:
+                self._db = SQLiteDB(self.path, SCHEMA)
+            return self._db
+
+    @staticmethod
+    def enabled() -> bool:
+        return Cfg().network.cache.enabled
+
+    @staticmethod
+    def get_ttl(host: str) -> float:
+        """获取指定站点的缓存有效期（秒）"""
+        cfg = Cfg().network.cache
+        for site in sorted(cfg.sites, key=len, reverse=True):
+            if host == site or host.endswith('.' + site):
+                return cfg.sites[site].total_seconds()
+        return cfg.ttl.total_seconds()
+
+    @staticmethod
+    def make_key(method: str, url: str, headers: dict = None, cookies: dict = None) -> str:
+        """根据请求方法、url以及会影响响应内容的请求头、Cookies生成缓存的键"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        relevant = [(k, headers[k]) for k in RELEVANT_HEADERS if k in headers]
+        items = [method.upper(), url, relevant, sorted(dict(cookies or {}).items())]
+        text = json.dumps(items, ensure_ascii=False)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, url: str) -> Response | None:
+        """读取缓存的响应，缓存不存在或已经过期时返回None"""
+        if not self.enabled():
+            return None
+        host = (urlsplit(url).hostname or '').lower()
+        ttl = self.get_ttl(host)
+        if ttl <= 0:
+            return None
+        now = time.time()
+        rows = self.db.execute('SELECT url, headers, body, created FROM response WHERE key=?', (key,))
+        if not rows:
+            return None
+        final_url, headers, body, created = rows[0]
+        if created + ttl < now:
+            self.db.execute('DELETE FROM response WHERE key=?', (key,))
+            return None
+        self.db.execute('UPDATE response SET accessed=? WHERE key=?', (now, key))
+        resp = Response()
+        resp.status_code = 200
+        resp.reason = 'OK'
+        resp.url = final_url
+        resp.headers = CaseInsensitiveDict(json.loads(headers))
+        resp._content = zlib.decompress(body)
+        logger.debug(f"使用缓存的响应: '{url}'")
+        return resp
+
+    def put(self, key: str, url: str, resp: Response) -> None:
+        """缓存一个响应（不符合缓存条件的响应将被忽略）"""
+        if not self.enabled():
+            return
+        if resp.status_code != 200 or resp.history:
+            return
+        host = (urlsplit(url).hostname or '').lower()
+        if self.get_ttl(host) <= 0:
+            return
+        body = zlib.compress(resp.content)
+        headers = json.dumps(dict(resp.headers), ensure_ascii=False)
+        now = time.time()
+        self.db.execute('INSERT OR REPLACE INTO response VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (key, host, resp.url, headers, body, len(body), now, now))
+        self.evict()
+
+    def evict(self):
+        """缓存总大小超出限制时，删除最久未被使用的条目"""
+        max_size = Cfg().network.cache.max_size
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM response')[0][0]
+        if total <= max_size:
+            return
+        # 一次多删除一些，避免每次写入新条目都要进行清理
+        target = total - max_size * 0.9
+        freed = 0
+        keys = []
+        for key, size in self.db.execute('SELECT key, size FROM response ORDER BY accessed'):
+            keys.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self.db.executemany('DELETE FROM response WHERE key=?', keys)
+        logger.debug(f'响应缓存超出大小限制，已删除{len(keys)}个最久未使用的条目')
+
+
+response_cache = ResponseCache()
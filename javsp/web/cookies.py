@@ -0,0 +1,84 @@
+"""在多次运行之间保存和恢复cloudscraper获得的Cookies（CloudFlare clearance、年龄确认等）"""
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+from requests.cookies import RequestsCookieJar, create_cookie
+
+
+from javsp.config import Cfg
+from javsp.storage import KVStore
+
+
+__all__ = ['ScraperCookieStore', 'scraper_cookies']
+
+
+logger = logging.getLogger(__name__)
+
+
+def _dump_cookie(cookie) -> dict:
+    return {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+            'path': cookie.path, 'secure': cookie.secure, 'expires': cookie.expires,
+            'rest': {'HttpOnly': cookie._rest['HttpOnly']} if cookie.has_nonstandard_attr('HttpOnly') else {}}
+
+
+class ScraperCookieStore:
+    """按站点保存cloudscraper的Cookies。CloudFlare的clearance与UA绑定，因此同时记录获取Cookies时使用的UA"""
+    def __init__(self, namespace='scraper_cookies') -> None:
+        self.store = KVStore(namespace)
+        # 每个站点最近一次保存的Cookies，用于避免重复写入
+        self.saved = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return Cfg().network.persist_cookies.enabled
+
+    @staticmethod
+    def get_site(host: str) -> str:
+        """将Cookie的domain或url中的主机名归一化为站点名"""
+        host = host.lstrip('.').lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def load(self, jar: RequestsCookieJar, url: str, user_agent: str):
+        """将url所在站点保存的、仍然有效的Cookies载入到jar中"""
+        if not self.enabled():
+            return
+        site = self.get_site(urlsplit(url).hostname or '')
+        record = self.store.get(site)
+        # UA不同时，之前获得的clearance对当前的UA无效（但记录仍可能属于使用其他UA的抓取器，因此只跳过而不删除）
+        if record is None or record['user_agent'] != user_agent:
+            return
+        now = time.time()
+        count = 0
+        for item in record['cookies']:
+            if item['expires'] is not None and item['expires'] <= now:
+                continue
+            jar.set_cookie(create_cookie(**item))
+            count += 1
+        if count:
+            logger.debug(f"已载入{site}的{count}个Cookies")
+
+    def save(self, jar: RequestsCookieJar, url: str, user_agent: str):
+        """保存jar中属于url所在站点的Cookies（仅在Cookies发生变化时写入）"""
+        if not self.enabled():
+            return
+        site = self.get_site(urlsplit(url).hostname or '')
+        cookies = [_dump_cookie(c) for c in list(jar) if self.get_site(c.domain) == site]
+        if not cookies:
+            return
+        signature = (user_agent, tuple(sorted((c['name'], c['value']) for c in cookies)))
+        with self.lock:
+            if self.saved.get(site) == signature:
+                return
+            self.saved[site] = signature
+        # 会话Cookies（没有过期时间）只保留一段时间，以免长期使用过时的会话
+        expires = [c['expires'] for c in cookies if c['expires'] is not None]
+        ttl = max(expires) - time.time() if expires else 0
+        if len(expires) < len(cookies):
+            ttl = max(ttl, Cfg().network.persist_cookies.session_ttl.total_seconds())
+        self.store.set(site, {'user_agent': user_agent, 'cookies': cookies}, ttl=ttl)
+
+
+scraper_cookies = ScraperCookieStore()
@@ -1,6 +1,6 @@
 """网页抓取相关的异常"""
 __all__ = ['CrawlerError', 'MovieNotFoundError', 'MovieDuplicateError', 'SiteBlocked',
-           'SitePermissionError', 'CredentialError', 'WebsiteError', 'OtherError']
+           'SitePermissionError', 'CredentialError', 'WebsiteError', 'CrawlerCancelled', 'OtherError']
 
 
 class CrawlerError(Exception):
@@ -44,5 +44,9 @@ class WebsiteError(CrawlerError):
     """非预期的状态码等网页故障"""
 
 
+class CrawlerCancelled(CrawlerError):
+    """抓取任务已被取消（超时或不再需要它的结果）"""
+
+
 class OtherError(CrawlerError):
     """其他尚未分类的错误"""
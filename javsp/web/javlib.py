@@ -2,10 +2,13 @@
 import logging
 from urllib.parse import urlsplit
 
+from requests.exceptions import RequestException
+
 
 from javsp.web.base import Request, read_proxy, resp2html
 from javsp.web.exceptions import *
-from javsp.web.proxyfree import get_proxy_free_url
+from javsp.web.proxyfree import (get_proxy_free_url, forget_proxy_free_url, probe_concurrently,
+                                 load_network_cfg, save_network_cfg, forget_network_cfg)
 from javsp.config import Cfg, CrawlerID
 from javsp.datatype import  MovieInfo
 
@@ -20,27 +23,39 @@ base_url = ''
 
 def init_network_cfg():
     """设置合适的代理模式和base_url"""
-    request.timeout = 5
+    cached = load_network_cfg('javlib')
+    if (isinstance(cached, dict) and isinstance(cached.get('url'), str)
+            and isinstance(cached.get('use_proxy'), bool)):
+        request.proxies = read_proxy() if cached['use_proxy'] else {}
+        return cached['url']
     proxy_free_url = get_proxy_free_url('javlib')
     urls = [str(Cfg().network.proxy_free[CrawlerID.javlib]), permanent_url]
     if proxy_free_url and proxy_free_url not in urls:
         urls.insert(1, proxy_free_url)
     # 使用代理容易触发IUAM保护，先尝试不使用代理访问
-    proxy_cfgs = [{}, read_proxy()] if Cfg().network.proxy_server else [{}]
-    for proxies in proxy_cfgs:
-        request.proxies = proxies
-        for url in urls:
-            if proxies == {} and url == permanent_url:
-                continue
-            try:
-                resp = request.get(url, delay_raise=True)
-                if resp.status_code == 200:
-                    request.timeout = Cfg().network.timeout.seconds
-                    return url
-            except Exception as e:
-                logger.debug(f"Fail to connect to '{url}': {e}")
+    proxy_cfgs = [False, True] if Cfg().network.proxy_server else [False]
+    candidates = [(use_proxy, url) for use_proxy in proxy_cfgs for url in urls
+                  if use_proxy or url != permanent_url]
+
+    def check(candidate):
+        use_proxy, url = candidate
+        # 各个测试并发进行，因此每个测试使用单独的Request实例
+        probe = Request(use_scraper=True)
+        probe.headers = request.headers
+        probe.timeout = 5
+        probe.proxies = read_proxy() if use_proxy else {}
+        resp = probe.get(url, delay_raise=True)
+        return resp.status_code == 200
+
+    # 所有组合同时测试，但仍然按照上面的优先级选择结果
+    passed = probe_concurrently(candidates, check, ordered=True)
+    if passed:
+        use_proxy, url = passed[0]
+        request.proxies = read_proxy() if use_proxy else {}
+        save_network_cfg('javlib', {'url': url, 'use_proxy': use_proxy})
+        return url
     logger.warning('无法绕开JavLib的反爬机制')
-    request.timeout = Cfg().network.timeout.seconds
+    request.proxies = read_proxy()
     return permanent_url
 
 
@@ -52,7 +67,14 @@ def parse_data(movie: MovieInfo):
         base_url = init_network_cfg()
         logger.debug(f"JavLib网络配置: {base_url}, proxy={request.proxies}")
     url = new_url = f'{base_url}/cn/vl_searchbyid.php?keyword={movie.dvdid}'
-    resp = request.get(url)
+    try:
+        resp = request.get(url)
+    except RequestException:
+        # 之前保存的网络配置可能已经失效，删除它，下一部影片会重新探测
+        forget_network_cfg('javlib')
+        forget_proxy_free_url('javlib')
+        base_url = ''
+        raise
     html = resp2html(resp)
     if resp.history:
         if urlsplit(resp.url).netloc == urlsplit(base_url).netloc:
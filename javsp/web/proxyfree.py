@@ -1,10 +1,102 @@
 """获取各个网站的免代理地址"""
 import re
 import sys
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
+from javsp.config import Cfg
+from javsp.storage import KVStore
 from javsp.web.base import is_connectable, get_html, get_resp_text, request_get
 
 
+__all__ = ['get_proxy_free_url', 'forget_proxy_free_url', 'probe_concurrently',
+           'load_network_cfg', 'save_network_cfg', 'forget_network_cfg']
+
+
+logger = logging.getLogger(__name__)
+# 保存探测到的可用地址，之后的运行直接使用，不必每次都重新探测。值为按响应速度排序的地址列表
+_url_store = KVStore('proxy_free')
+# 保存各抓取器最终选定的网络配置（如JavLib的地址和是否使用代理），与上面的地址列表分开保存
+_network_store = KVStore('network_cfg')
+
+
+def _ttl():
+    return Cfg().network.proxy_free_ttl.total_seconds()
+
+
+def load_network_cfg(site_name: str):
+    """读取之前保存的指定站点的网络配置（不存在或已过期时返回None）"""
+    return _network_store.get(site_name.lower())
+
+
+def save_network_cfg(site_name: str, value):
+    """保存指定站点的网络配置，有效期由network.proxy_free_ttl决定"""
+    if _ttl() > 0:
+        _network_store.set(site_name.lower(), value, ttl=_ttl())
+
+
+def forget_network_cfg(site_name: str):
+    """删除保存的指定站点的网络配置（例如按照此配置访问站点失败时）"""
+    _network_store.delete(site_name.lower())
+
+
+def forget_proxy_free_url(site_name: str):
+    """删除保存的指定站点的免代理地址，下次使用时重新探测"""
+    _url_store.delete(site_name.lower())
+
+
+def probe_concurrently(candidates: list, check, ordered=False, wait_all=False):
+    """并发地测试所有候选项，返回通过测试的候选项
+    Args:
+        candidates (list): 候选项列表
+        check (callable): 测试函数，接受一个候选项作为参数，返回是否通过测试（抛出异常视为未通过）
+        ordered (bool, optional): 为False时按照通过测试的先后（即响应速度）排序；为True时按照candidates的
+            顺序排序，并且只需等待排在第一个通过测试的候选项前面的候选项测试结束
+        wait_all (bool, optional): 为True时等待所有测试结束，返回全部通过测试的候选项；
+            为False时得到最优的候选项后立即返回
+    Returns:
+        list: 已知通过测试的候选项，最优的排在最前面（没有可用的候选项时为空列表）
+    """
+    if not candidates:
+        return []
+    def safe_check(candidate):
+        try:
+            return bool(check(candidate))
+        except Exception as e:
+            logger.debug(f"测试'{candidate}'时出错: {e}")
+            return False
+
+    executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix='probe')
+    futures = {executor.submit(safe_check, c): i for i, c in enumerate(candidates)}
+    results = {}
+    passed = []
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[futures[fut]] = fut.result()
+                if fut.result():
+                    passed.append(futures[fut])
+            if wait_all:
+                continue
+            if not ordered and passed:
+                break
+            if ordered:
+                # 排在前面的候选项都已经有了结果时，第一个通过测试的候选项就是最终结果
+                for i in range(len(candidates)):
+                    if i not in results:
+                        break
+                    if results[i]:
+                        return [candidates[j] for j in sorted(passed)]
+    finally:
+        # 不等待尚未结束的测试
+        executor.shutdown(wait=False, cancel_futures=True)
+    if ordered:
+        passed.sort()
+    return [candidates[i] for i in passed]
+
+
 def get_proxy_free_url(site_name: str, prefer_url=None) -> str:
     """获取指定网站的免代理地址
     Args:
@@ -13,28 +105,46 @@ def get_proxy_free_url(site_name: str, prefer_url=None) -> str:
     Returns:
         str: 指定站点的免代理地址（失败时为空字符串）
     """
+    site_name = site_name.lower()
+    cached = _url_store.get(site_name)
+    if not (isinstance(cached, list) and cached and all(isinstance(i, str) for i in cached)):
+        if cached is not None:
+            logger.debug(f"忽略格式无效的{site_name}免代理地址缓存: {cached!r}")
+        cached = None
+    # 指定了新的prefer_url时仍要先测试它
+    if cached and (not prefer_url or prefer_url in cached):
+        url = prefer_url or cached[0]
+        logger.debug(f"使用之前探测到的{site_name}免代理地址: {url}")
+        return url
     if prefer_url and is_connectable(prefer_url, timeout=5):
+        _save_urls(site_name, [prefer_url])
         return prefer_url
     # 当prefer_url不可用时，尝试自动获取指定网站的免代理地址
-    site_name = site_name.lower()
     func_name = f'_get_{site_name}_urls'
     get_funcs = [i for i in dir(sys.modules[__name__]) if i.startswith('_get_')]
     if func_name in get_funcs:
         get_urls = getattr(sys.modules[__name__], func_name)
         try:
             urls = get_urls()
-            return _choose_one(urls)
+            ranked = _rank(urls)
         except:
             return ''
+        if ranked:
+            _save_urls(site_name, ranked)
+            return ranked[0]
+        return ''
     else:
         raise Exception("Dont't know how to get proxy-free url for " + site_name)
 
 
-def _choose_one(urls) -> str:
-    for url in urls:
-        if is_connectable(url, timeout=5):
-            return url
-    return ''
+def _save_urls(site_name: str, urls: list):
+    if _ttl() > 0:
+        _url_store.set(site_name, urls, ttl=_ttl())
+
+
+def _rank(urls) -> list:
+    """并发测试所有地址，返回全部可用的地址（按响应速度排序，最快的排在最前面）"""
+    return probe_concurrently(list(urls or []), lambda url: is_connectable(url, timeout=5), wait_all=True)
 
 
 def _get_avsox_urls() -> list:
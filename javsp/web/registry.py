@@ -0,0 +1,81 @@
+"""抓取器的注册表：启动时只检查抓取器模块是否存在，直到第一次需要抓取数据时才导入它"""
+import sys
+import logging
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Dict, List
+
+
+__all__ = ['CrawlerRegistry', 'crawler_registry']
+
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlerRegistry:
+    """导入抓取器模块时会创建Request（以及cloudscraper会话）、读取genre数据等，比较耗时，因此推迟到首次使用时再导入"""
+    def __init__(self, package='javsp.web') -> None:
+        self.package = package
+        self.names: List[str] = []
+        self.modules: Dict[str, ModuleType] = {}
+        # 导入失败的模块及其异常，不会再重复尝试导入
+        self.errors: Dict[str, Exception] = {}
+        self.lock = threading.Lock()
+
+    def module_name(self, name: str) -> str:
+        return f'{self.package}.{name}'
+
+    def exists(self, name: str) -> bool:
+        """检查抓取器模块是否存在（不会导入或执行它）"""
+        mod = self.module_name(name)
+        if mod in sys.modules:
+            return True
+        try:
+            return importlib.util.find_spec(mod) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def register(self, names) -> List[str]:
+        """登记要使用的抓取器，返回不存在的抓取器"""
+        unknown = []
+        for name in names:
+            if name in self.names:
+                continue
+            if self.exists(name):
+                self.names.append(name)
+            else:
+                unknown.append(name)
+        return unknown
+
+    def load(self, name: str) -> ModuleType:
+        """获取抓取器模块，首次调用时才导入它。导入失败时抛出异常，之后的调用直接抛出同一个异常"""
+        module = self.modules.get(name)
+        if module is None:
+            error = self.errors.get(name)
+            if error is not None:
+                raise error
+            # 同一个模块的导入由Python的导入锁保护，这里只需保护字典
+            try:
+                module = importlib.import_module(self.module_name(name))
+            except Exception as e:
+                with self.lock:
+                    self.errors[name] = e
+                logger.error(f"无法加载抓取器'{name}': {e}")
+                raise
+            with self.lock:
+                self.modules[name] = module
+            logger.debug(f'已加载抓取器: {name}')
+        return module
+
+    def get_parser(self, name: str):
+        """获取抓取器的解析函数"""
+        return self.load(name).parse_data
+
+    def handles_retry(self, name: str) -> bool:
+        """抓取器如果带有parse_data_raw，说明它已经自行进行了重试处理"""
+        return hasattr(self.load(name), 'parse_data_raw')
+
+
+crawler_registry = CrawlerRegistry()
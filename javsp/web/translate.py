@@ -31,9 +31,9 @@ def translate_movie_info(info: MovieInfo):
             info.title = result['trans']
             # 如果有的话，附加断句信息
             if 'orig_break' in result:
-                setattr(info, 'ori_title_break', result['orig_break'])
+                info.ori_title_break = result['orig_break']
             if 'trans_break' in result:
-                setattr(info, 'title_break', result['trans_break'])
+                info.title_break = result['trans_break']
         else:
             logger.error('翻译标题时出错: ' + result['error'])
             return False
@@ -41,8 +41,7 @@ def translate_movie_info(info: MovieInfo):
     if info.plot and Cfg().translator.fields.plot:
         result = translate(info.plot, Cfg().translator.engine, info.actress)
         if 'trans' in result:
-            # 只有翻译过plot的影片才可能需要ori_plot属性，因此在运行时动态添加，而不添加到类型定义里
-            setattr(info, 'ori_plot', info.plot)
+            info.ori_plot = info.plot
             info.plot = result['trans']
         else:
             logger.error('翻译简介时出错: ' + result['error'])
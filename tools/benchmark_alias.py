@@ -0,0 +1,77 @@
+"""测试女优别名解析的速度：对比逐条遍历别名表与使用倒排索引，并检查两者的结果是否一致"""
+import os
+import sys
+import json
+import time
+from argparse import ArgumentParser
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.alias import ActressAliasIndex
+
+
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'actress_alias.json')
+
+
+def linear_resolve(mapping, name):
+    """旧的实现：逐条检查别名表"""
+    for fixed_name, aliases in mapping.items():
+        if name in aliases:
+            return fixed_name
+    return name
+
+
+def enlarge(mapping, times):
+    """复制别名表，模拟用户添加了大量自定义别名的情况"""
+    if times == 1:
+        return mapping
+    large = {}
+    for i in range(times):
+        for fixed_name, aliases in mapping.items():
+            large[f'{fixed_name}#{i}'] = [f'{a}#{i}' for a in aliases]
+    return large
+
+
+def run_pass(resolve, names, rounds):
+    """返回每秒可以解析的名字数"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            resolve(name)
+    elapsed = time.perf_counter() - start
+    return len(names) * rounds / elapsed
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description='测试女优别名解析的速度')
+    parser.add_argument('-d', '--data', default=DEFAULT_DATA, help='别名文件')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='重复测试的轮数')
+    args, _ = parser.parse_known_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    for times in (1, 10, 100):
+        mapping = enlarge(base, times)
+        # 待解析的名字：最后一份别名表中的所有别名，再加上同样数量的未收录的名字（最坏情况）
+        suffix = '' if times == 1 else f'#{times-1}'
+        names = [a + suffix for aliases in base.values() for a in aliases]
+        names += [f'未收录{i}' for i in range(len(names))]
+        start = time.perf_counter()
+        index = ActressAliasIndex(fuzzy_match=False)
+        index.add(mapping)
+        build_time = time.perf_counter() - start
+        fuzzy = ActressAliasIndex(fuzzy_match=True)
+        fuzzy.add(mapping)
+        mismatch = [i for i in names if index.resolve(i) != linear_resolve(mapping, i)]
+        linear = run_pass(lambda name: linear_resolve(mapping, name), names, 1)
+        exact = run_pass(index.resolve, names, args.rounds)
+        fuzzy_speed = run_pass(fuzzy.resolve, names, args.rounds)
+        print(f'别名数: {len(index):,} (建立索引耗时{build_time*1000:.1f}ms)')
+        print(f'  逐条遍历: {linear:,.0f} names/s')
+        print(f'  倒排索引: {exact:,.0f} names/s')
+        print(f'  倒排索引(模糊匹配): {fuzzy_speed:,.0f} names/s')
+        if mismatch:
+            print(f'有{len(mismatch)}个名字的解析结果与逐条遍历不一致:')
+            for name in mismatch[:20]:
+                print(f'  {name}')
+            sys.exit(1)
@@ -0,0 +1,68 @@
+"""测试番号提取的速度（每秒可以处理的文件数），并检查提取结果是否与测试数据一致"""
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.avid import get_ids, get_extractor, _match_cid, guess_av_type
+
+
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), '..', 'unittest', 'testdata_avid.txt')
+
+
+def load_testdata(path):
+    """读取测试数据，返回[(filename, avid, ignore)]"""
+    items = []
+    with open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip('\r\n').split('\t')
+            if len(parts) == 2:
+                items.append((parts[0], parts[1], False))
+            elif len(parts) == 3:
+                items.append((parts[0], parts[1], True))
+    return items
+
+
+def clear_cache():
+    get_extractor().match_name.cache_clear()
+    _match_cid.cache_clear()
+    guess_av_type.cache_clear()
+
+
+def run_pass(names, rounds):
+    """重复rounds轮提取所有文件名的番号，返回每秒处理的文件数"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            get_ids(name)
+    elapsed = time.perf_counter() - start
+    return len(names) * rounds / elapsed
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description='测试番号提取的速度')
+    parser.add_argument('-d', '--data', default=DEFAULT_DATA, help='测试数据文件（每行为: 文件名\\t番号）')
+    parser.add_argument('-r', '--rounds', type=int, default=20, help='重复测试的轮数')
+    args, _ = parser.parse_known_args()
+
+    items = load_testdata(args.data)
+    names = [i[0] for i in items]
+    mismatch = [(name, avid) for name, avid, ignore in items
+                if not ignore and get_ids(name)[0] not in (avid, avid.upper())]
+    # 无缓存：每一轮开始前清空缓存，相当于每次都扫描新的文件
+    cold = []
+    for _ in range(args.rounds):
+        clear_cache()
+        cold.append(run_pass(names, 1))
+    # 有缓存：重复扫描同一批文件（如多次运行或多个文件夹下有同名文件）
+    warm = run_pass(names, args.rounds)
+    print(f'测试数据: {len(names)}个文件名, {args.rounds}轮')
+    print(f'无缓存: {max(cold):,.0f} files/s (最好), {sorted(cold)[len(cold)//2]:,.0f} files/s (中位数)')
+    print(f'有缓存: {warm:,.0f} files/s')
+    if mismatch:
+        print(f'有{len(mismatch)}个文件名的番号与测试数据不一致:')
+        for name, avid in mismatch:
+            print(f'  {avid}\t{name}')
+        sys.exit(1)
@@ -0,0 +1,79 @@
+"""测试汇总多个抓取器数据(info_summary)的速度，以及MovieInfo实例占用的内存"""
+import os
+import sys
+import time
+import random
+import tracemalloc
+from argparse import ArgumentParser
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.__main__ import info_summary
+from javsp.config import MovieInfoField
+from javsp.datatype import Movie, MovieInfo
+
+
+FIELDS = [i.value for i in MovieInfoField]
+
+
+def make_all_info(avid, crawlers, rng):
+    """生成各抓取器的数据：每个抓取器随机获取到一部分字段"""
+    all_info = {}
+    for i in range(crawlers):
+        info = MovieInfo(avid)
+        info.url = f'https://site{i}.example.com/{avid}'
+        for k in FIELDS:
+            if k in ('dvdid', 'cid', 'url') or rng.random() < 0.5:
+                continue
+            if k in ('genre', 'actress', 'preview_pics'):
+                setattr(info, k, [f'{k}{i}-{j}' for j in range(3)])
+            elif k == 'actress_pics':
+                info.actress_pics = {f'actress{i}': f'https://site{i}.example.com/{j}.jpg' for j in range(2)}
+            elif k == 'uncensored':
+                info.uncensored = rng.random() < 0.5
+            else:
+                setattr(info, k, f'{k} from site{i}')
+        all_info[f'site{i}'] = info
+    return all_info
+
+
+def copy_all_info(all_info):
+    result = {}
+    for name, info in all_info.items():
+        copy = MovieInfo(info.dvdid)
+        for k in FIELDS:
+            setattr(copy, k, getattr(info, k))
+        result[name] = copy
+    return result
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description='测试汇总抓取器数据的速度')
+    parser.add_argument('-n', '--movies', type=int, default=500, help='影片数')
+    parser.add_argument('-c', '--crawlers', type=int, default=20, help='每部影片的抓取器数')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='重复测试的轮数')
+    args, _ = parser.parse_known_args()
+
+    rng = random.Random(0)
+    samples = [make_all_info(f'ABC-{i:03d}', args.crawlers, rng) for i in range(args.movies)]
+
+    # 内存：每部影片的各抓取器数据
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [[MovieInfo('ABC-001') for _ in range(args.crawlers)] for _ in range(args.movies)]
+    per_info = (tracemalloc.get_traced_memory()[0] - before) / (args.movies * args.crawlers)
+    tracemalloc.stop()
+    del kept
+
+    # 每部影片的数据只能汇总一次（info_summary会修改各抓取器的数据），因此先复制好所有的输入
+    best = float('inf')
+    for _ in range(args.rounds):
+        inputs = [copy_all_info(i) for i in samples]
+        start = time.perf_counter()
+        for all_info in inputs:
+            info_summary(Movie('ABC-001'), all_info)
+        best = min(best, time.perf_counter() - start)
+
+    print(f'测试数据: {args.movies}部影片 x {args.crawlers}个抓取器')
+    print(f'每个MovieInfo实例: {per_info:,.0f} bytes')
+    print(f'info_summary: {args.movies / best:,.0f} movies/s (最好)')
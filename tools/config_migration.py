@@ -80,6 +80,24 @@ scanner:
   # 格式要求：https://docs.pydantic.dev/2.0/usage/types/bytesize/
   minimum_size: {cfg['File']['ignore_video_file_less_than']}MiB
   skip_nfo_dir: {skip_nfo_dir}
+  # 扫描文件夹时并行扫描子文件夹的线程数（对于NAS等网络上的文件夹，适当增大此值可以加快扫描）
+  scan_workers: 8
+  # 在本地记录扫描过的文件夹，再次扫描时跳过内容没有变化的文件夹（大幅加快大型媒体库的扫描）
+  index:
+    enabled: yes
+    # 增量模式：只整理新增或有变化的影片文件，已经成功整理过的影片（比如不移动文件时）不再重复整理
+    incremental: no
+  # 监视模式：整理完已有的影片后不退出，而是持续监视待整理的文件夹，新的影片下载完成后自动整理
+  watch:
+    enabled: no
+    # 文件大小在多长时间内没有变化时，认为文件已经下载完成
+    settle_time: PT30S
+    # 无法使用inotify时（非Linux系统或者inotify不可用），每隔多长时间扫描一次文件夹
+    poll_interval: PT1M
+    # Linux下使用inotify获取文件的变化（对于某些网络文件夹，inotify可能无法收到变化，此时可以关闭）
+    use_inotify: yes
+  # 边扫描边整理：每个文件夹扫描完成后立即开始整理其中的影片，不必等待整个文件夹扫描完毕（仅在不需要人工检查番号时生效）
+  streaming: yes
 
 ################################
 network:
@@ -89,10 +107,49 @@ network:
   # 各个站点的免代理地址。地址失效时软件会自动尝试获取新地址，你也可以手动设置
   proxy_free:
 {'\n'.join([f"    {id}: '{url}'" for id, url in dict(cfg['ProxyFree']).items()])}
+  # 自动探测到的免代理地址会保存下来，在此时长内直接使用而不必重新探测
+  proxy_free_ttl: P1D
   # 网络问题导致抓取数据失败时的重试次数，通常3次就差不多了
   retry: {cfg['Network']['retry']}
   # https://en.wikipedia.org/wiki/ISO_8601#Durations
   timeout: PT{cfg['Network']['timeout']}S
+  # 访问同一站点（域名）的频率限制，每个站点单独计算，互不影响
+  # rate: 平均每秒最多发起多少次请求（0表示不限制）; burst: 短时间内允许连续发起的请求数
+  politeness:
+    default: {{rate: 2, burst: 4}}
+    # 针对特定站点的设置（也会应用于其子域名）
+    sites:
+      javdb.com: {{rate: 0.5, burst: 2}}
+  # 每个站点最多同时进行多少个抓取任务（同时整理多部影片时，所有影片共享此限制。0表示不限制）
+  concurrency:
+    default: 4
+    sites:
+      airav: 2
+      javbus: 2
+      javdb: 1
+  # 每个站点使用一个长期复用的连接池，避免每次请求都重新建立连接（通过代理访问时尤为明显）
+  session:
+    # 每个站点的连接池最多缓存多少个目标主机（用于重定向到其他主机的情况）
+    pool_connections: 4
+    # 每个主机最多保持多少个连接（应不小于对同一站点的并发请求数）
+    pool_maxsize: 10
+    # 是否保持连接（禁用时每个请求结束后都会断开连接）
+    keep_alive: yes
+  # 将访问过的网页缓存到本地，重复整理同一批影片时直接使用缓存（仅缓存成功且未重定向的GET请求）
+  cache:
+    enabled: no
+    # 缓存的有效期
+    ttl: P7D
+    # 针对特定站点的有效期（也会应用于其子域名，PT0S表示不缓存）
+    sites:
+      api.github.com: PT0S
+    # 缓存占用空间的上限，超出后删除最久未使用的条目
+    max_size: 512MiB
+  # 保存通过CloudFlare检测、年龄确认等获得的Cookies，下次运行时直接使用，不必再重新通过检测
+  persist_cookies:
+    enabled: yes
+    # 没有过期时间的会话Cookies的保留时长
+    session_ttl: P1D
 
 ################################
 crawler:
@@ -106,19 +163,65 @@ crawler:
     gyutto: [{', '.join(cfg['CrawlerSelect']['gyutto'].split(','))}]
   # 爬虫至少要获取到哪些字段才可以视为抓取成功？
   required_keys: [{', '.join(cfg['Crawler']['required_keys'].split(','))}]
+  # 优先级较高的抓取器已经获取到required_keys和desired_keys中的所有字段时，不再等待其余的抓取器
+  # （可以显著减少每部影片的抓取耗时，但是优先级较低的站点提供的备选封面等数据会被舍弃）
+  early_completion: no
+  # 启用early_completion时，除了required_keys以外还希望获取到的字段
+  desired_keys: [actress, genre, publish_date, plot, preview_pics]
   # 努力爬取更准确更丰富的信息（会略微增加部分站点的爬取耗时）
   hardworking: {yes_to_true(cfg['Crawler']['hardworking_mode'])}
   # 使用网页番号作为最终番号（启用时会对番号大小写等进行更正）
   respect_site_avid: {yes_to_true(cfg['Crawler']['respect_site_avid'])}
   # fc2fan已关站。如果你有镜像，请设置本地镜像文件夹的路径，此文件夹内要有类似'FC2-12345.html'的网页文件
   fc2fan_local_path: '{cfg['Crawler']['fc2fan_local_path']}'
-  # 刮削一部电影后的等待时间（设置为0禁用此功能）
-  # https://en.wikipedia.org/wiki/ISO_8601#Durations
-  sleep_after_scraping: PT{cfg['Crawler']['sleep_after_scraping']}S
   # 是否使用javdb的封面（fallback/yes/no, 默认fallback: 如果能从别的站点获得封面则不用javdb的以避免水印）
   use_javdb_cover: {use_javdb_cover(cfg['Crawler']['ignore_javdb_cover'])}
   # 是否统一女优艺名。启用时会尝试将女优的多个艺名统一成一个
   normalize_actress_name: {yes_to_true(cfg['Crawler']['unify_actress_name'])}
+  # 女优别名的匹配规则（仅在启用normalize_actress_name时生效）
+  actress_alias:
+    # 匹配时忽略全角/半角、大小写、空格以及异体字（如'亞'和'亜'）的差异
+    fuzzy_match: yes
+    # 自定义的别名文件列表，格式与data/actress_alias.json相同。其中的条目优先于内置的别名
+    user_files: []
+  # 在本地缓存各个抓取器获取到的影片数据，再次整理同一影片时直接使用（不访问网络，也不受站点改版影响）
+  info_cache:
+    enabled: yes
+    # 缓存的数据在多长时间内视为有效
+    ttl: P7D
+  # 记录各个站点未找到的影片，一段时间内不再向这些站点查询它们（重新整理大量影片时可以节省很多时间）
+  miss_cache:
+    enabled: yes
+    # 首次未找到后跳过多长时间。之后每次仍未找到时，跳过的时间都会翻倍
+    ttl: P1D
+    # 跳过的时间的上限
+    max_ttl: P30D
+  # 站点被屏蔽或连续出现网络错误时，在一段时间内跳过此站点，避免后续的每部影片都要等待重试和超时
+  circuit_breaker:
+    enabled: yes
+    # 连续出错多少次后跳过此站点（被站点屏蔽、Cookies失效等错误会立即跳过）
+    failure_threshold: 3
+    # 跳过多长时间后再次尝试访问此站点
+    cooldown: PT5M
+  # 根据各个站点的历史命中率和耗时（按番号前缀分别统计）选择要访问的站点。统计数据可以通过tools/crawler_stats.py查看
+  adaptive_selection:
+    # 是否启用（禁用时也会记录统计数据，但始终访问selection中的所有站点）
+    enabled: no
+    # 站点至少要有多少条记录，才会根据统计数据跳过它
+    min_samples: 10
+    # 命中率低于此值的站点将被跳过
+    min_hit_rate: 0.05
+    # 被跳过的站点仍以此概率被访问，以便发现站点开始收录此类影片
+    explore: 0.1
+    # 仅统计此时间范围内的记录
+    window: P90D
+  # 跳过只收录特定厂商影片的站点（如prestige）中不会有的番号前缀。路由表内置于data/label_routes.json，并会根据抓取结果自动补充
+  label_routing:
+    enabled: yes
+    # 站点未找到路由表中没有的前缀的影片达到此次数后，才跳过此站点（避免因路由表不全而漏掉影片）
+    min_misses: 2
+    # 仍以此概率访问被跳过的站点，以便学习到站点新收录的前缀
+    explore: 0.02
 
 ################################
 # 配置整理时的命名规则
@@ -200,8 +303,6 @@ summarizer:
   extra_fanarts:
     # 是否下载剧照？
     enabled: {yes_to_true(cfg['Picture'].get('use_extra_fanarts','no'))}
-    # 间隔的两次封面爬取请求之间应该间隔多久
-    scrap_interval: PT{cfg['Picture'].get('extra_fanarts_scrap_interval','no')}S
 
 ################################
 translator:
@@ -252,7 +353,20 @@ other:
   # 是否允许检查更新。如果允许，在有新版本时会显示提示信息和新版功能
   check_update: {yes_to_true(cfg['Other']['check_update'])}
   # 是否允许检查到新版本时自动下载
-  auto_update: {yes_to_true(cfg['Other']['auto_update'])}"""
+  auto_update: {yes_to_true(cfg['Other']['auto_update'])}
+  # 以流水线方式整理多部影片：前一部影片下载封面、写入文件的同时，下一部影片已经开始抓取数据
+  pipeline:
+    # 是否启用流水线（禁用时逐部整理影片）
+    enabled: no
+    # 抓取、翻译、图片、文件各阶段的并发数
+    crawl_workers: 1
+    translate_workers: 1
+    image_workers: 2
+    file_workers: 1
+    # 阶段之间最多缓存多少部影片（0表示不限制）
+    queue_size: 2
+  # 缓存、索引等本地数据的存放位置（留空时使用用户主目录下的.javsp文件夹）
+  data_dir: null"""
 
 with open(args.output, mode ="w") as file:
     file.write(config_str)
@@ -0,0 +1,35 @@
+"""查看各个抓取器的历史命中率、耗时和提供的字段，便于调整抓取器的配置"""
+import os
+import sys
+from argparse import ArgumentParser
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.crawlerstats import crawler_stats
+
+
+def print_report(prefix=None, min_samples=1, show_fields=False):
+    summary = crawler_stats.summary(prefix.upper() if prefix else None)
+    if not summary:
+        print('没有统计数据')
+        return
+    for pre in sorted(summary):
+        crawlers = {k: v for k, v in summary[pre].items() if v['samples'] >= min_samples}
+        if not crawlers:
+            continue
+        print(f'[{pre}]')
+        print(f"  {'crawler':<12}{'samples':>8}{'hit_rate':>10}{'p50(s)':>9}{'p95(s)':>9}")
+        for name, s in sorted(crawlers.items(), key=lambda x: (-x[1]['hit_rate'], x[1]['p50'])):
+            print(f"  {name:<12}{s['samples']:>8}{s['hit_rate']:>10.0%}{s['p50']:>9.2f}{s['p95']:>9.2f}")
+            if show_fields and s['fields']:
+                fields = sorted(s['fields'].items(), key=lambda x: -x[1])
+                print('    ' + ', '.join(f'{f}: {r:.0%}' for f, r in fields))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description='查看抓取器的统计数据')
+    parser.add_argument('-p', '--prefix', help='仅显示指定番号前缀的统计数据（如ABC）')
+    parser.add_argument('-n', '--min-samples', type=int, default=1, help='仅显示记录数不少于此值的抓取器')
+    parser.add_argument('-f', '--fields', action='store_true', help='同时显示各个抓取器提供各字段的比例')
+    args, _ = parser.parse_known_args()
+    print_report(args.prefix, args.min_samples, args.fields)
@@ -0,0 +1,35 @@
+import os
+import sys
+import json
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.alias import ActressAliasIndex, normalize_name
+
+
+def test_normalize_name():
+    assert normalize_name('三上悠亞') == normalize_name('三上悠亜')
+    assert normalize_name('ＡＩＫＡ') == normalize_name('aika')
+    assert normalize_name('河北 彩花') == normalize_name('河北彩花')
+
+
+def test_resolve_alias(tmp_path):
+    builtin = tmp_path / 'builtin.json'
+    builtin.write_text(json.dumps({'三上悠亜': ['三上悠亜', '鬼頭桃菜'], '河北彩花': ['河北彩伽']}), encoding='utf-8')
+    user = tmp_path / 'user.json'
+    user.write_text(json.dumps({'鬼頭桃菜': ['鬼頭桃菜']}), encoding='utf-8')
+
+    index = ActressAliasIndex(fuzzy_match=False)
+    index.load(str(builtin))
+    assert index.resolve('鬼頭桃菜') == '三上悠亜'
+    assert index.resolve('三上悠亞') == '三上悠亞'
+    assert index.resolve('未收录') == '未收录'
+
+    # 先加载的用户别名文件优先
+    index = ActressAliasIndex(fuzzy_match=True)
+    index.load(str(user))
+    index.load(str(builtin))
+    assert index.resolve('鬼頭桃菜') == '鬼頭桃菜'
+    assert index.resolve('三上悠亞') == '三上悠亜'
+    assert index.resolve('河北 彩伽') == '河北彩花'
+    assert len(index) == 3
@@ -6,7 +6,7 @@ from shutil import rmtree
 
 file_dir = os.path.dirname(__file__)
 sys.path.insert(0, os.path.abspath(os.path.join(file_dir, '..')))
-from javsp.avid import get_id, get_cid
+from javsp.avid import get_id, get_cid, get_ids
 
 
 @pytest.fixture
@@ -85,6 +85,13 @@ def test_from_file():
             f.writelines(rewrite_lines)
 
 
+def test_get_ids():
+    assert ('FC2-123456', '', 'fc2') == get_ids('FC2-PPV-123456.mp4')
+    assert ('AB-012', 'ab012st', 'cid') == get_ids('ab012st.mp4')
+    assert ('ABCD-123', '', 'normal') == get_ids('ABCD-123.mp4')
+    assert ('', '', '') == get_ids('Yuukiy')
+
+
 def test_cid_invalid():
     assert '' == get_cid('hasUpperletter.mp4')
     assert '' == get_cid('存在非ASCII字符.mp4')
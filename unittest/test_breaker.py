@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.breaker import BreakerState, CircuitBreaker
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker('test', failure_threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow()
+    time.sleep(0.1)
+    # 冷却结束后只放行一个试探请求
+    assert breaker.allow()
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert not breaker.allow()
+    # 试探失败时重新暂停访问
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.1)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.allow()
+    breaker.record_failure(fatal=True)
+    assert not breaker.allow()
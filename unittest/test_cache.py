@@ -0,0 +1,34 @@
+import os
+import sys
+
+from requests.models import Response
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.cache import ResponseCache
+
+
+def make_resp(url, content, status_code=200):
+    r = Response()
+    r.status_code = status_code
+    r.url = url
+    r.headers['Content-Type'] = 'text/html; charset=utf-8'
+    r._content = content
+    return r
+
+
+def test_response_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResponseCache, 'enabled', staticmethod(lambda: True))
+    cache = ResponseCache(tmp_path / 'cache.db')
+    url = 'https://www.example.com/movie/ABC-123'
+    key = cache.make_key('GET', url, {'Accept-Language': 'ja'})
+    assert key != cache.make_key('GET', url, {'Accept-Language': 'zh'})
+    assert cache.get(key, url) is None
+    cache.put(key, url, make_resp(url, '<html>ABC-123</html>'.encode('utf-8')))
+    r = cache.get(key, url)
+    assert r.status_code == 200
+    assert r.text == '<html>ABC-123</html>'
+    assert r.headers['content-type'] == 'text/html; charset=utf-8'
+    # 非200的响应不应被缓存
+    key2 = cache.make_key('GET', url + '/404')
+    cache.put(key2, url + '/404', make_resp(url + '/404', b'', 404))
+    assert cache.get(key2, url + '/404') is None
@@ -0,0 +1,28 @@
+import os
+import sys
+
+from requests.cookies import RequestsCookieJar
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.storage import SQLiteDB, KVStore, KV_SCHEMA
+from javsp.web.cookies import ScraperCookieStore
+
+
+def test_scraper_cookies(tmp_path, monkeypatch):
+    monkeypatch.setattr(ScraperCookieStore, 'enabled', staticmethod(lambda: True))
+    store = ScraperCookieStore()
+    store.store = KVStore('scraper_cookies', SQLiteDB(tmp_path / 'kv.db', KV_SCHEMA))
+    for site, ua in (('javdb.com', 'UA-1'), ('javbus.com', 'UA-2')):
+        jar = RequestsCookieJar()
+        jar.set('cf_clearance', site, domain='.' + site, path='/')
+        store.save(jar, f'https://www.{site}/', ua)
+
+    # 只载入请求的站点的Cookies
+    jar = RequestsCookieJar()
+    store.load(jar, 'https://javdb.com/v/abc', 'UA-1')
+    assert [(c.name, c.value) for c in jar] == [('cf_clearance', 'javdb.com')]
+    # UA不同时跳过记录，但不删除（它可能属于使用其他UA的抓取器）
+    jar = RequestsCookieJar()
+    store.load(jar, 'https://www.javbus.com/ABC-123', 'UA-1')
+    assert len(jar) == 0
+    assert store.store.get('javbus.com') is not None
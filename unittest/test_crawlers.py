@@ -57,8 +57,8 @@ def compare(avid, scraper, file):
 
     try:
         # 解包数据再进行比较，以便测试不通过时快速定位不相等的键值
-        local_vars = vars(local)
-        online_vars = vars(online)
+        local_vars = local.to_dict()
+        online_vars = online.to_dict()
         for k, v in online_vars.items():
             # 部分字段可能随时间变化，因此只要这些字段不是一方有值一方无值就行
             if k in ['score', 'magnet']:
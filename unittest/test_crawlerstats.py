@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.datatype import MovieInfo
+from javsp.crawlerstats import CrawlerStats, get_prefix
+
+
+def test_crawler_stats(tmp_path, monkeypatch):
+    monkeypatch.setattr(CrawlerStats, 'enabled', staticmethod(lambda: True))
+    stats = CrawlerStats(tmp_path / 'stats.db')
+    info = MovieInfo('ABC-123')
+    info.title = '标题'
+    for latency in (1, 2, 3):
+        stats.record('javbus', 'ABC-123', info, True, latency)
+    stats.record('mgstage', 'ABC-123', info, False, 0.5)
+    summary = stats.summary()['ABC']
+    assert summary['javbus']['hit_rate'] == 1
+    assert summary['javbus']['p50'] == 2
+    assert summary['javbus']['fields'] == {'title': 1}
+    assert summary['mgstage']['hit_rate'] == 0
+    assert get_prefix('082713-417') == '#'
+    assert get_prefix('heyzo-1234') == 'HEYZO'
+    assert get_prefix('259LUXU-1234') == 'LUXU'
+    assert get_prefix('h_1234abc00123') == 'ABC'
+
+
+def test_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(CrawlerStats, 'enabled', staticmethod(lambda: False))
+    stats = CrawlerStats(tmp_path / 'stats.db')
+    # 未启用自适应选择时也会记录统计数据
+    stats.record('javbus', 'ABC-123', MovieInfo('ABC-123'), True, 1)
+    assert stats.summary()['ABC']['javbus']['samples'] == 1
@@ -7,7 +7,9 @@ from shutil import rmtree
 
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from javsp.file import scan_movies
+import javsp.file
+from javsp.file import scan_movies, iter_movies, find_subtitle_in_dir, _TreeWalker, _MovieScanner
+from javsp.scanindex import ScanIndex
 
 
 tmp_folder = 'TMP_' + ''.join(random.choices(string.ascii_uppercase, k=6))
@@ -157,6 +159,18 @@ def test_scan_movies__nothing_in_cwd(prepare_files):
     assert len(movies) == 0
 
 
+# 重复扫描同一文件夹（如监视模式）时，无法识别番号的文件只报告一次
+@pytest.mark.parametrize('files', [('无法识别.mp4',)])
+def test_scan_movies__report_once(prepare_files, monkeypatch):
+    monkeypatch.setattr(javsp.file, 'failed_items', [])
+    monkeypatch.setattr(javsp.file, '_reported_files', set())
+    for _ in range(3):
+        assert scan_movies(tmp_folder) == []
+    failed = javsp.file.get_failed_when_scan()
+    assert len(failed) == 1
+    assert os.path.basename(failed[0].files[0]) == '无法识别.mp4'
+
+
 # 无效：多个分片命名杂乱
 @pytest.mark.parametrize('files', [('ABC-123-1.mp4','ABC-123-第2部分.mp4','ABC-123-3.mp4')])
 def test_scan_movies__strange_names(prepare_files):
@@ -226,3 +240,104 @@ def test_scan_movies__n_video_with_ad(prepare_files):
     assert len(movies) == 2
     assert movies[0].dvdid == 'ABC-123' and movies[1].dvdid == 'DEF-456'
     assert all(len(i.files) == 1 for i in movies)
+
+
+# 忽略特定名称的文件夹以及带有nfo的文件夹（skip_nfo_dir）
+@pytest.mark.parametrize('files', [{'ABC-123.mp4': DEFAULT_SIZE, '#recycle/DEF-456.mp4': DEFAULT_SIZE,
+                                    'done/GHI-789.mp4': DEFAULT_SIZE, 'done/GHI-789.nfo': 1024, 'sub/sub/JKL-012.mp4': DEFAULT_SIZE}])
+def test_scan_movies__ignored_folders(prepare_files):
+    movies = scan_movies(tmp_folder)
+    assert [i.dvdid for i in movies] == ['ABC-123', 'JKL-012']
+
+
+# 边扫描边返回影片：分片的识别与scan_movies一致
+@pytest.mark.parametrize('files', [('ABC-123.1.mp4', 'ABC-123.2.mp4', 'sub/DEF-456.mp4', 'sub/GHI-789-A.mp4', 'sub/GHI-789-B.mp4')])
+def test_iter_movies(prepare_files):
+    movies = iter_movies(tmp_folder)
+    first = next(movies)
+    assert first.dvdid == 'ABC-123'
+    assert [os.path.basename(i) for i in first.files] == ['ABC-123.1.mp4', 'ABC-123.2.mp4']
+    rest = {i.dvdid: i for i in movies}
+    assert sorted(rest) == ['DEF-456', 'GHI-789']
+    assert [os.path.basename(i) for i in rest['GHI-789'].files] == ['GHI-789-A.mp4', 'GHI-789-B.mp4']
+
+
+def test_scan_index(tmp_path, monkeypatch):
+    index = ScanIndex(tmp_path / 'scan.db')
+    monkeypatch.setattr(javsp.file, 'scan_index', index)
+    monkeypatch.setattr(ScanIndex, 'enabled', staticmethod(lambda: True))
+    root = tmp_path / 'lib'
+    (root / 'sub').mkdir(parents=True)
+    touch_file_size(root / 'ABC-123.mp4', DEFAULT_SIZE)
+    touch_file_size(root / 'sub' / 'DEF-456.mp4', DEFAULT_SIZE)
+    touch_file_size(root / 'sub' / 'DEF-456.chs.srt', 1024)
+    movies = scan_movies(str(root))
+    assert [i.dvdid for i in movies] == ['ABC-123', 'DEF-456']
+    # 字幕在扫描影片时已经建立了索引
+    assert find_subtitle_in_dir(str(root), 'def-456') == str(root / 'sub' / 'DEF-456.chs.srt')
+    assert find_subtitle_in_dir(str(root / 'sub'), 'DEF-456') == str(root / 'sub' / 'DEF-456.chs.srt')
+    assert find_subtitle_in_dir(str(root), 'ABC-123') is None
+    index.set_status(movies[0].files, ScanIndex.DONE)
+    # 将文件夹的修改时间调早，使记录可信
+    for d in (root, root / 'sub'):
+        os.utime(d, (0, 0))
+    scan_movies(str(root))
+    extensions = ['.mp4']
+    def rescan():
+        walker = _TreeWalker(extensions, 2, _MovieScanner(str(root)).records)
+        files = [f for _, files in walker.walk(str(root)) for f in files]
+        return walker, files
+    walker, files = rescan()
+    assert walker.changed == []
+    assert {f.name: f.status for f in files} == {'ABC-123.mp4': 'done', 'DEF-456.mp4': 'new'}
+    assert all(f.avid for f in files)
+    # 只有发生变化的文件夹会被重新读取
+    touch_file_size(root / 'sub' / 'GHI-789.mp4', DEFAULT_SIZE)
+    walker, files = rescan()
+    assert [i.path for i in walker.changed] == [str(root / 'sub')]
+    assert len(files) == 3
+
+
+def test_scan_index_streaming(tmp_path, monkeypatch):
+    index = ScanIndex(tmp_path / 'scan.db')
+    monkeypatch.setattr(javsp.file, 'scan_index', index)
+    monkeypatch.setattr(ScanIndex, 'enabled', staticmethod(lambda: True))
+    root = tmp_path / 'lib'
+    (root / 'sub').mkdir(parents=True)
+    touch_file_size(root / 'ABC-123.mp4', DEFAULT_SIZE)
+    touch_file_size(root / 'sub' / 'DEF-456.mp4', DEFAULT_SIZE)
+    def load_status():
+        records = index.load(ScanIndex.fingerprint(_MovieScanner(str(root)).all_extensions))
+        return {f.name: f.status for r in records.values() for f in r.files}
+    # 边扫描边整理：返回影片时其记录已在索引中，整理结果可以立即写入
+    movies = iter_movies(str(root))
+    first = next(movies)
+    assert first.dvdid == 'ABC-123'
+    index.set_status(first.files, ScanIndex.DONE)
+    # 提前停止扫描（如整理出错）时，已经整理的结果和扫描到的文件夹也会被保存
+    movies.close()
+    assert load_status()['ABC-123.mp4'] == ScanIndex.DONE
+    # 完整扫描后，整理结果不会被覆盖
+    movies = list(iter_movies(str(root)))
+    index.set_status(movies[-1].files, ScanIndex.FAILED)
+    status = load_status()
+    assert status['ABC-123.mp4'] == ScanIndex.DONE
+    assert status['DEF-456.mp4'] == ScanIndex.FAILED
+
+
+def test_subtitle_index_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(javsp.file, 'subtitle_index', javsp.file.SubtitleIndex())
+    root = tmp_path / 'lib'
+    (root / 'sub').mkdir(parents=True)
+    touch_file_size(root / 'ABC-123.mp4', DEFAULT_SIZE)
+    touch_file_size(root / 'sub' / 'ABC-123.chs.srt', 1024)
+    touch_file_size(root / 'sub' / 'DEF-456.mp4', DEFAULT_SIZE)
+    movies = iter_movies(str(root))
+    first = next(movies)
+    assert first.dvdid == 'ABC-123'
+    # 子文件夹尚未扫描，此时不能认为字幕索引已经完整
+    assert not javsp.file.subtitle_index.covers(str(root))
+    assert find_subtitle_in_dir(str(root), 'ABC-123') == str(root / 'sub' / 'ABC-123.chs.srt')
+    list(movies)
+    assert javsp.file.subtitle_index.covers(str(root / 'sub'))
+    assert find_subtitle_in_dir(str(root), 'abc-123') == str(root / 'sub' / 'ABC-123.chs.srt')
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.storage import SQLiteDB, KVStore, KV_SCHEMA
+from javsp.datatype import MovieInfo
+from javsp.infocache import InfoCache, MissCache
+
+
+def test_info_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(InfoCache, 'enabled', staticmethod(lambda: True))
+    cache = InfoCache()
+    cache.store = KVStore('movie_info', SQLiteDB(tmp_path / 'kv.db', KV_SCHEMA))
+    info = MovieInfo('ABC-123')
+    key = InfoCache.make_key('javbus', info)
+    # 抓取器会使用站点上的番号覆盖info中的番号
+    info.dvdid = 'ABC-0123'
+    info.title = '标题'
+    info.actress = ['女优A', '女优B']
+    cache.save(key, info)
+    loaded = MovieInfo('abc-123')
+    assert cache.load(InfoCache.make_key('javbus', loaded), loaded)
+    assert loaded == info
+    assert not cache.load(InfoCache.make_key('javdb', MovieInfo('ABC-123')), MovieInfo('ABC-123'))
+    assert InfoCache.make_key('fanza', MovieInfo(cid='abc00123')) == 'fanza:cid=abc00123'
+
+
+def test_miss_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(MissCache, 'enabled', staticmethod(lambda: True))
+    cache = MissCache()
+    cache.store = KVStore('movie_miss', SQLiteDB(tmp_path / 'kv.db', KV_SCHEMA))
+    key = InfoCache.make_key('javbus', MovieInfo('ABC-123'))
+    assert not cache.is_missing(key)
+    cache.record(key)
+    assert cache.is_missing(key)
+    cache.forget(key)
+    assert not cache.is_missing(key)
@@ -24,3 +24,12 @@ def test_detect_special_attr():
     assert run('STARS225uC.mp4', 'STARS-225') == 'UC'
     assert run('STARS-225CD1.mp4', 'STARS-225') == ''
     assert run('stars225cd2.mp4', 'STARS-225') == ''
+
+
+def test_resource_path_frozen(monkeypatch, tmp_path):
+    # 打包后的程序会切换工作目录，因此resource_path必须返回基于可执行文件所在文件夹的绝对路径
+    monkeypatch.setattr(sys, 'frozen', True, raising=False)
+    monkeypatch.setattr(sys, 'executable', str(tmp_path / 'JavSP.exe'))
+    path = resource_path('data/genre_javbus.csv')
+    assert os.path.isabs(path)
+    assert path == str(tmp_path / 'data' / 'genre_javbus.csv')
@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import random
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.pipeline import Stage, Pipeline
+from javsp.datatype import Movie
+
+
+def test_keep_order():
+    def slow_double(item):
+        time.sleep(random.random() / 100)
+        item.append(item[0] * 2)
+
+    stages = [Stage('a', slow_double, 3), Stage('b', slow_double, 2), Stage('c', lambda x: None, 1)]
+    items = [[i] for i in range(20)]
+    result = Pipeline(stages, queue_size=2).run(items)
+    assert [i[0] for i in result] == list(range(20))
+    assert all(i == [i[0], i[0]*2, i[0]*2] for i in result)
+
+
+def test_drop_failed_items():
+    def fail_on_odd(item):
+        if item % 2:
+            raise ValueError(item)
+
+    done = []
+    stages = [Stage('a', fail_on_odd, 2), Stage('b', lambda x: None, 1)]
+    result = Pipeline(stages, on_done=lambda item, success: done.append((item, success))).run(range(10))
+    assert result == [0, 2, 4, 6, 8]
+    assert sorted(done) == [(i, i % 2 == 0) for i in range(10)]
+
+
+def test_stages_overlap():
+    # 第一个条目处于第二阶段时，第二个条目应当已经开始第一阶段
+    second_started = threading.Event()
+    overlapped = []
+
+    def first(item):
+        if item == 1:
+            second_started.set()
+
+    def second(item):
+        if item == 0:
+            overlapped.append(second_started.wait(timeout=5))
+
+    Pipeline([Stage('a', first), Stage('b', second)]).run([0, 1])
+    assert overlapped == [True]
+
+
+def test_fail_fast():
+    def fail_on_three(item):
+        if item == 3:
+            raise ValueError(item)
+
+    done = []
+    pipeline = Pipeline([Stage('a', fail_on_three, 1), Stage('b', lambda x: None, 1)],
+                        on_done=lambda item, success: done.append((item, success)), fail_fast=True)
+    with pytest.raises(ValueError):
+        pipeline.run(range(10))
+    assert (3, False) in done
+    assert sorted(done)[:4] == [(0, True), (1, True), (2, True), (3, False)]
+    assert all(i < 3 for i, success in done if success)
+
+
+def run_main_mode(monkeypatch, mode, fail_avid=None):
+    """使用假的整理步骤运行整理模式，返回(整理成功的影片, 各影片的整理状态, 抛出的异常)"""
+    import javsp.__main__ as main
+
+    def make_step(name):
+        def step(movie, bar=None):
+            if movie.dvdid == fail_avid and name == 'scrape':
+                raise Exception('步骤错误')
+            movie.steps = getattr(movie, 'steps', []) + [name]
+        return step
+
+    for name in ('scrape', 'translate'):
+        monkeypatch.setattr(main, f'{name}_movie', make_step(name))
+    monkeypatch.setattr(main, 'process_images', make_step('images'))
+    monkeypatch.setattr(main, 'organize_files', make_step('files'))
+    status = {}
+    monkeypatch.setattr(main, 'mark_scan_status', lambda movie, success: status.update({movie.dvdid: success}))
+
+    movies = []
+    for i in range(8):
+        movie = Movie(f'ABC-{i:03d}')
+        movie.files = [f'ABC-{i:03d}.mp4']
+        movies.append(movie)
+    result, error = None, None
+    try:
+        if mode == 'pipeline':
+            result = main.RunPipelineMode(movies)
+        else:
+            result = main.RunNormalMode(movies)
+    except Exception as e:
+        error = e
+    done = [(i.dvdid, i.steps) for i in result] if result is not None else None
+    return done, status, error
+
+
+def test_pipeline_mode_matches_serial(monkeypatch):
+    import javsp.__main__ as main
+    assert not main.Cfg().other.pipeline.enabled
+    serial = run_main_mode(monkeypatch, 'serial')
+    assert serial[0] and serial[2] is None
+    assert run_main_mode(monkeypatch, 'pipeline') == serial
+
+    # 某部影片整理失败时，两种模式都中止整理并抛出同样的异常
+    done, status, error = run_main_mode(monkeypatch, 'serial', 'ABC-003')
+    p_done, p_status, p_error = run_main_mode(monkeypatch, 'pipeline', 'ABC-003')
+    assert str(error) == str(p_error) == '步骤错误'
+    assert status == p_status == {'ABC-000': True, 'ABC-001': True, 'ABC-002': True, 'ABC-003': False}
@@ -1,8 +1,21 @@
 import os
 import sys
+import time
+
+import pytest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import javsp.web.proxyfree as proxyfree
 from javsp.web.proxyfree import *
+from javsp.storage import SQLiteDB, KVStore, KV_SCHEMA
+
+
+@pytest.fixture(autouse=True)
+def tmp_store(tmp_path, monkeypatch):
+    """使用临时的数据库，避免测试结果写入用户的数据目录"""
+    db = SQLiteDB(tmp_path / 'kv.db', KV_SCHEMA)
+    monkeypatch.setattr(proxyfree, '_url_store', KVStore('proxy_free', db))
+    monkeypatch.setattr(proxyfree, '_network_store', KVStore('network_cfg', db))
 
 
 def test_get_url():
@@ -14,5 +27,42 @@ def test_get_url_with_prefer():
     prefer_url = 'https://www.baidu.com'
     assert prefer_url == get_proxy_free_url('javlib', prefer_url)
 
+
+def test_probe_concurrently():
+    def check(candidate):
+        name, delay, ok = candidate
+        time.sleep(delay)
+        return ok
+    candidates = [('a', 0.5, False), ('b', 0.1, True), ('c', 0.3, True)]
+    assert probe_concurrently(candidates, check)[0][0] == 'b'
+    assert probe_concurrently(candidates, check, ordered=True)[0][0] == 'b'
+    assert probe_concurrently([('a', 0.1, True), ('b', 0.05, True)], check, ordered=True)[0][0] == 'a'
+    assert probe_concurrently(candidates[:1], check) == []
+    assert [i[0] for i in probe_concurrently(candidates, check, wait_all=True)] == ['b', 'c']
+
+
+def test_cached_url(monkeypatch):
+    monkeypatch.setattr(proxyfree, '_rank', lambda urls: ['https://b.example.com', 'https://a.example.com'])
+    monkeypatch.setattr(proxyfree, '_get_javbus_urls', lambda: ['https://a.example.com', 'https://b.example.com'])
+    assert get_proxy_free_url('javbus') == 'https://b.example.com'
+    monkeypatch.setattr(proxyfree, '_rank', lambda urls: pytest.fail('should use cached urls'))
+    assert get_proxy_free_url('javbus') == 'https://b.example.com'
+    # 站点的网络配置与免代理地址分开保存，互不影响
+    save_network_cfg('javbus', {'url': 'https://c.example.com', 'use_proxy': False})
+    assert get_proxy_free_url('javbus') == 'https://b.example.com'
+    assert load_network_cfg('javbus')['url'] == 'https://c.example.com'
+    forget_proxy_free_url('javbus')
+    monkeypatch.setattr(proxyfree, '_rank', lambda urls: [])
+    assert get_proxy_free_url('javbus') == ''
+    assert load_network_cfg('javbus') is not None
+
+
+def test_invalid_cached_url(monkeypatch):
+    proxyfree._url_store.set('javbus', {'url': 'https://c.example.com', 'use_proxy': False})
+    monkeypatch.setattr(proxyfree, '_rank', lambda urls: ['https://a.example.com'])
+    monkeypatch.setattr(proxyfree, '_get_javbus_urls', lambda: ['https://a.example.com'])
+    assert get_proxy_free_url('javbus') == 'https://a.example.com'
+
+
 if __name__ == "__main__":
     print(get_proxy_free_url('javlib'))
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import javsp.web.registry as registry
+from javsp.web.registry import CrawlerRegistry
+
+
+def test_load_failure_cached(monkeypatch):
+    calls = []
+    def broken_import(name):
+        calls.append(name)
+        raise ImportError(f'broken: {name}')
+    monkeypatch.setattr(registry.importlib, 'import_module', broken_import)
+    reg = CrawlerRegistry()
+    with pytest.raises(ImportError):
+        reg.get_parser('javbus')
+    # 导入失败的模块不应在每部影片抓取时都重新导入
+    with pytest.raises(ImportError):
+        reg.get_parser('javbus')
+    with pytest.raises(ImportError):
+        reg.handles_retry('javbus')
+    assert calls == ['javsp.web.javbus']
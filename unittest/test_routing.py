@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.storage import SQLiteDB, KVStore, KV_SCHEMA
+from javsp.datatype import MovieInfo
+from javsp.routing import LabelRouter, get_label
+
+
+def test_label_router(tmp_path, monkeypatch):
+    monkeypatch.setattr(LabelRouter, 'enabled', staticmethod(lambda: True))
+    router = LabelRouter()
+    db = SQLiteDB(tmp_path / 'kv.db', KV_SCHEMA)
+    router.store = KVStore('label_routes', db)
+    router.miss_store = KVStore('label_routes_misses', db)
+    assert get_label('259LUXU-1234') == 'LUXU'
+    assert router.can_have('prestige', 'ABP')
+    # 路由表中没有的前缀，只有在站点多次未找到此前缀的影片后才跳过
+    assert router.can_have('prestige', 'SSIS')
+    router.record_miss('prestige', 'SSIS-001')
+    assert router.can_have('prestige', 'SSIS')
+    router.record_miss('prestige', 'SSIS-002')
+    assert not router.can_have('prestige', 'SSIS')
+    assert router.can_have('javbus', 'SSIS')
+    # 其他站点的结果显示影片属于只收录特定厂商影片的站点时，学习新的前缀
+    info = MovieInfo('NEWP-001')
+    info.producer = 'プレステージ'
+    router.learn('javbus', info)
+    assert router.can_have('prestige', 'NEWP')
+    assert 'NEWP' in router.store.get('prestige')
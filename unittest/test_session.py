@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.config import Cfg
+from javsp.web.base import Request, session_pool
+
+
+def test_scraper_keeps_adapter():
+    request = Request(use_scraper=True)
+    adapter = request.scraper.adapters['https://']
+    # cloudscraper依赖自定义的adapter来通过Cloudflare的检查，设置连接池时不能替换它
+    assert type(adapter).__name__ == 'CipherSuiteAdapter'
+    assert adapter._pool_maxsize == Cfg().network.session.pool_maxsize
+    assert adapter.poolmanager.connection_pool_kw.get('ssl_context') is adapter.ssl_context
+
+
+def test_session_pool():
+    session = session_pool.get_session('https://www.example.com/a')
+    assert session is session_pool.get_session('https://WWW.example.com/b')
+    adapter = session.adapters['https://']
+    assert adapter._pool_maxsize == Cfg().network.session.pool_maxsize
+    assert adapter.poolmanager.connection_pool_kw['maxsize'] == Cfg().network.session.pool_maxsize
@@ -0,0 +1,34 @@
+import os
+import sys
+import subprocess
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# 这些模块导入比较耗时或者有副作用，应当在实际用到时才导入，而不是在启动时
+LAZY_MODULES = ['PIL', 'pretty_errors', 'colorama', 'cloudscraper']
+CRAWLER_PREFIX = 'javsp.web.'
+NON_CRAWLER_MODULES = ['base', 'cache', 'cookies', 'exceptions', 'registry', 'translate']
+
+
+def get_imported_modules():
+    """使用'-X importtime'获取导入javsp.__main__时导入的所有模块"""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    code = "import sys; sys.argv = ['javsp']; import javsp.__main__"
+    p = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=root,
+                       capture_output=True, text=True, check=True)
+    modules = set()
+    for line in p.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            name = line.split('|')[-1].strip()
+            if name != 'imported package':
+                modules.add(name)
+    return modules
+
+
+def test_lazy_imports():
+    modules = get_imported_modules()
+    assert 'javsp.__main__' in modules
+    for mod in LAZY_MODULES:
+        assert mod not in modules, f"启动时不应导入'{mod}'"
+    crawlers = [i for i in modules if i.startswith(CRAWLER_PREFIX) and i[len(CRAWLER_PREFIX):] not in NON_CRAWLER_MODULES]
+    assert not crawlers, f"启动时不应导入抓取器: {crawlers}"
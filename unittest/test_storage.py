@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.storage import SQLiteDB, KVStore, KV_SCHEMA
+
+
+def test_kv_store(tmp_path):
+    db = SQLiteDB(tmp_path / 'kv.db', KV_SCHEMA)
+    store = KVStore('test', db)
+    other = KVStore('other', db)
+    store.set('a', {'x': [1, 2]})
+    store.set('b', 1, ttl=-1)
+    other.set('a', 'other')
+    assert store.get('a') == {'x': [1, 2]}
+    assert store.get('b', 'expired') == 'expired'
+    assert store.items() == [('a', {'x': [1, 2]})]
+    store.clear()
+    assert store.get('a') is None
+    assert other.get('a') == 'other'
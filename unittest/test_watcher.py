@@ -0,0 +1,128 @@
+import os
+import sys
+import pytest
+from types import SimpleNamespace
+from datetime import timedelta
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import javsp.watcher as watcher_mod
+from javsp.watcher import InotifyWatcher, PollingWatcher, watch_movies
+from javsp.datatype import Movie
+
+
+def poll_until(watcher, expected, rounds=5):
+    changed = set()
+    for _ in range(rounds):
+        changed |= watcher.poll(timeout=0.2)
+        if changed >= expected:
+            break
+    return changed
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify仅在Linux下可用')
+def test_inotify_watcher(tmp_path):
+    watcher = InotifyWatcher(str(tmp_path), ['.mp4'])
+    try:
+        (tmp_path / 'ABC-123.mp4').write_bytes(b'0')
+        (tmp_path / 'readme.txt').write_bytes(b'0')
+        assert poll_until(watcher, {str(tmp_path / 'ABC-123.mp4')}) == {str(tmp_path / 'ABC-123.mp4')}
+        # 新建的文件夹会被自动监视
+        sub = tmp_path / 'sub'
+        sub.mkdir()
+        poll_until(watcher, set(), rounds=1)
+        (sub / 'DEF-456.mp4').write_bytes(b'0')
+        assert str(sub / 'DEF-456.mp4') in poll_until(watcher, {str(sub / 'DEF-456.mp4')})
+        # 忽略的文件夹不会被监视
+        ignored = tmp_path / '#recycle'
+        ignored.mkdir()
+        poll_until(watcher, set(), rounds=1)
+        (ignored / 'GHI-789.mp4').write_bytes(b'0')
+        assert not poll_until(watcher, set(), rounds=1)
+    finally:
+        watcher.close()
+
+
+def test_polling_watcher(tmp_path):
+    (tmp_path / 'ABC-123.mp4').write_bytes(b'0')
+    watcher = PollingWatcher(str(tmp_path), ['.mp4'], interval=0)
+    assert watcher.poll(timeout=0) == set()
+    (tmp_path / 'DEF-456.mp4').write_bytes(b'0')
+    (tmp_path / 'ABC-123.mp4').write_bytes(b'00')
+    assert watcher.poll(timeout=0) == {str(tmp_path / 'DEF-456.mp4'), str(tmp_path / 'ABC-123.mp4')}
+
+
+class StopWatching(Exception):
+    pass
+
+
+class FakeWatcher:
+    """依次返回预设的变化，全部返回后停止监视"""
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.closed = False
+
+    def poll(self, timeout):
+        if not self.batches:
+            raise StopWatching
+        return self.batches.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+def use_fake_watcher(monkeypatch, fake):
+    cfg = SimpleNamespace(scanner=SimpleNamespace(filename_extensions=['.mp4'],
+                                                  watch=SimpleNamespace(settle_time=timedelta(0))))
+    monkeypatch.setattr(watcher_mod, 'Cfg', lambda: cfg)
+    monkeypatch.setattr(watcher_mod, 'create_watcher', lambda root, extensions: fake)
+
+
+def test_watch_movies(tmp_path, monkeypatch):
+    paths = [str(tmp_path / f'ABC-00{i}.mp4') for i in range(1, 4)]
+    for p in paths:
+        with open(p, 'wb') as f:
+            f.write(b'0')
+    fake = FakeWatcher([set(paths), set(), set()])
+    use_fake_watcher(monkeypatch, fake)
+    def scan_movies(root):
+        movies = []
+        for p in paths:
+            movie = Movie(os.path.splitext(os.path.basename(p))[0])
+            movie.files = [p]
+            movies.append(movie)
+        return movies
+    monkeypatch.setattr(watcher_mod, 'scan_movies', scan_movies)
+    handled = []
+    def on_movies(movies):
+        handled.append([i.dvdid for i in movies])
+        if movies[0].dvdid == 'ABC-001':
+            raise RuntimeError('整理失败')
+    with pytest.raises(StopWatching):
+        watch_movies(str(tmp_path), on_movies)
+    # 文件稳定后逐部整理，一部影片整理失败不影响同一批中的其他影片
+    assert handled == [['ABC-001'], ['ABC-002'], ['ABC-003']]
+    assert fake.closed
+
+
+def test_watch_movies_scan_error(tmp_path, monkeypatch):
+    path = str(tmp_path / 'ABC-001.mp4')
+    with open(path, 'wb') as f:
+        f.write(b'0')
+    fake = FakeWatcher([{path}, set(), set(), set()])
+    use_fake_watcher(monkeypatch, fake)
+    calls = []
+    def scan_movies(root):
+        calls.append(root)
+        if len(calls) == 1:
+            raise OSError('扫描失败')
+        movie = Movie('ABC-001')
+        movie.files = [path]
+        return [movie]
+    monkeypatch.setattr(watcher_mod, 'scan_movies', scan_movies)
+    handled = []
+    with pytest.raises(StopWatching):
+        watch_movies(str(tmp_path), lambda movies: handled.extend(i.dvdid for i in movies))
+    # 扫描出错时，这些文件会在稍后被重新处理
+    assert len(calls) == 2
+    assert handled == ['ABC-001']